@@ -138,6 +138,18 @@ class ConfigHandler:
         self.efficiency_gw_threshold = \
             params_setting.get("efficiency_gw_threshold")
 
+        # =====================================================================
+        # Initialize PerformanceSetting (optional)
+        # =====================================================================
+        # Retrieve settings for loading the input data, module defaults are
+        # used for settings missing in the configuration file (None)
+        performance_setting = \
+            self.get("RuntimeOptions.PerformanceSetting", default={})
+        self.input_chunks = performance_setting.get("input_chunks")
+        self.dask_scheduler = performance_setting.get("dask_scheduler")
+        self.load_workers = performance_setting.get("load_workers")
+        self.float_precision = performance_setting.get("float_precision")
+
         # =====================================================================
         # Initialize CellSpecificOutput
         # =====================================================================
@@ -160,6 +172,7 @@ class ConfigHandler:
         self._validate_simulation_period()
         self._validate_simulation_options()
         self._validate_params_setting()
+        self._validate_performance_setting()
         self._validate_cell_specific_output()
         self._validate_output_selection()
         # Check if any errors were found
@@ -267,6 +280,42 @@ class ConfigHandler:
                 )
             self.errors_found = True
 
+    def _validate_performance_setting(self):
+        """Validate performance settings."""
+        # Ensure 'input_chunks' maps dimensions to chunk sizes if set. A
+        # chunk size is a positive integer, -1 (full dimension) or 'auto'.
+        if self.input_chunks is not None and (
+                not isinstance(self.input_chunks, dict) or
+                not all(size == "auto" or
+                        (isinstance(size, int) and
+                         not isinstance(size, bool) and
+                         (size > 0 or size == -1))
+                        for size in self.input_chunks.values())):
+            logger.error(
+                "'input_chunks' must be a dictionary of dimension names and "
+                "chunk sizes (positive integers, -1 or 'auto')"
+                )
+            self.errors_found = True
+        # Ensure 'dask_scheduler' is a known dask scheduler if set
+        if self.dask_scheduler not in \
+                [None, "synchronous", "threads", "processes"]:
+            logger.error(
+                "'dask_scheduler' must be 'synchronous', 'threads' or "
+                "'processes'"
+                )
+            self.errors_found = True
+        # Ensure 'load_workers' is a positive integer if set
+        if self.load_workers is not None and (
+                not isinstance(self.load_workers, int) or
+                isinstance(self.load_workers, bool) or
+                self.load_workers < 1):
+            logger.error("'load_workers' must be a positive integer")
+            self.errors_found = True
+        # Ensure 'float_precision' is a known floating point type if set
+        if self.float_precision not in [None, "float32", "float64"]:
+            logger.error("'float_precision' must be 'float32' or 'float64'")
+            self.errors_found = True
+
     def _validate_cell_specific_output(self):
         """Validate runtime options."""
         # Ensure 'CellSpecificOutput' is a dictionary
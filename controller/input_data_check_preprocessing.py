@@ -15,7 +15,7 @@ from controller.check_functions import (
     check_dataset_structure_metadata, check_spatial_coords, check_time_coords)
 
 from controller.preprocessing_functions import (
-    extend_xr_data, trim_xr_data, ensure_correct_dimension_order,
+    extend_xr_data, trim_and_reorder_xr_data, ensure_correct_dimension_order,
     sort_lat_desc_lon_asc_coords
     )
 
@@ -66,8 +66,14 @@ def check_and_preprocess_input_data(
 
     datasets_dict = preprocess_input_data_based_on_config(
         datasets_dict, config)
-    # Initialize the dictionary for preprocessed datasets
+    # Initialize the dictionary for preprocessed datasets with an entry
+    # including the unit for each sector
     preprocessed_datasets = {}
+    for sector in datasets_dict:
+        expected_units = \
+            sector_requirements.get(sector, {}).get("expected_units", [])
+        preprocessed_datasets[sector] = \
+            {'unit': expected_units[0] if expected_units else None}
 
     # Validate and process each dataset in the nested dictionary structure
     for sector, variables in datasets_dict.items():
@@ -76,12 +82,6 @@ def check_and_preprocess_input_data(
         expected_units = sector_info.get("expected_units", [])
         time_freq = sector_info.get("time_freq", None)
 
-        # Create entry for sector in preprocessed_datasets with unit
-        # if it doesn't exist
-        if sector not in preprocessed_datasets:
-            preprocessed_datasets[sector] = \
-                {'unit': expected_units[0] if expected_units else None}
-
         for variable, dataset in variables.items():
             log_id = f"{sector}/{variable}"
             logger.debug(log_id)
@@ -100,18 +100,22 @@ def check_and_preprocess_input_data(
             # Validate that spatial coords are same in all datasets
             check_logs = check_spatial_coords(dataset, check_logs)
 
-            # Validate and preprocess time aspects of dataset
+            # Validate and preprocess time aspects of dataset, which also
+            # brings time-variant data into the correct dimension order
             if variable in time_variant_vars:
                 dataset, check_logs = check_preprocess_time_variant_input(
                     dataset, check_logs, log_id, time_freq, config
                     )
-
-            # Ensure correct dimension order
-            dataset = ensure_correct_dimension_order(dataset)
-
-            # Store the preprocessed dataset in the dictionary
-            preprocessed_datasets[sector][variable] = next(
-                iter(dataset.data_vars.values())
+            else:
+                # Ensure correct dimension order
+                dataset = ensure_correct_dimension_order(dataset)
+
+            # Store the preprocessed data variable in the dictionary. Input
+            # files may use their own variable name, then the only data
+            # variable of the dataset is taken.
+            preprocessed_datasets[sector][variable] = (
+                dataset[variable] if variable in dataset.data_vars
+                else next(iter(dataset.data_vars.values()))
                 )
 
     check_logs.pop("lat_lon_reference", None)
@@ -131,7 +135,9 @@ def check_preprocess_time_variant_input(
     This function performs validation of the time coverage and resolution of
     the input dataset. If the dataset does not cover the required period and
     `time_extend_mode` is enabled, the dataset will be extended. Otherwise,
-    the dataset is trimmed to match the required time period.
+    the dataset is trimmed to match the required time period. In both cases
+    the dimensions of the returned dataset are ordered as ("time", "lat",
+    "lon").
 
     Parameters
     ----------
@@ -172,7 +178,7 @@ def check_preprocess_time_variant_input(
         check_logs["extended_time_period"].append(log_id)
     # Step 2b: (Preprocessing) Trim dataset if it covers the required period
     else:
-        dataset = trim_xr_data(dataset, start_year, end_year)
+        dataset = trim_and_reorder_xr_data(dataset, start_year, end_year)
 
     return dataset, check_logs
 
@@ -12,22 +12,42 @@
 
 import sys
 import os
-import glob
 import json
+import logging
+from types import MappingProxyType
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import dask
 import xarray as xr
 from gwswuse_logger import get_logger
 from controller.input_data_check_preprocessing import \
     check_and_preprocess_input_data
 
+# orjson is an optional, faster drop-in for parsing the conventions
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 # =============================================================================
-# Get module name and remove the .py extension
 # Module name is passed to logger
 # =============================================================================
-modname = os.path.basename(__file__)
-modname = modname.split('.')[0]
-
 logger = get_logger(__name__)
 
+# Default dask chunks for input data: an empty dict follows the chunks the
+# files are stored in, so each stored chunk is only decompressed once
+INPUT_CHUNKS = {}
+
+# Default maximum number of threads opening input data
+MAX_LOAD_WORKERS = 32
+
+# Opening files with the netCDF4 library is not thread-safe. NetCDF3 files,
+# which h5netcdf cannot read, are therefore opened one at a time.
+NETCDF4_OPEN_LOCK = threading.Lock()
+
+# Parsed conventions keyed by (absolute path, modification time, file size)
+CONVENTIONS_CACHE = {}
+
 # =============================================================================
 # INPUT DATA MANAGER MAIN FUNCTION
 # =============================================================================
@@ -46,6 +66,13 @@ def input_data_manager(config):
         - convention_path (str):
             Path to file with conventions and sector
           requirements.
+        - input_chunks (dict or None):
+            Dask chunk sizes for opening the input data. If None, the
+            stored chunks of the files are used.
+        - dask_scheduler (str or None):
+            Dask scheduler used while opening the input data.
+        - load_workers (int or None):
+            Maximum number of threads opening the input data.
         Additional settings are used within check_and_preprocess_input_data for
         check and preprocess input data.
 
@@ -61,8 +88,8 @@ def input_data_manager(config):
     datasets_dict : dict of dict of xarray.Dataset
         A nested dictionary with sectors as keys, and each sector containing
         a dictionary of variables with loaded xarray.Dataset objects as values.
-    conventions : dict
-        Loaded conventions and sector requirements.
+    conventions : types.MappingProxyType
+        Loaded conventions and sector requirements (read-only).
 
     Notes
     -----
@@ -73,6 +100,7 @@ def input_data_manager(config):
     3. Checks and preprocesses the input data, using additional settings from
        config.
     4. Handle the results of input data checks.
+    5. Computes the preprocessed input data.
     """
     # Confirm paths for input data and conventions
     logger.debug("Using input data path: %s", config.input_data_path)
@@ -84,10 +112,15 @@ def input_data_manager(config):
     sector_requirements = conventions['sector_requirements']
     logger.debug("Input data conventions loaded successfully.")
 
-    # load input data
+    # load input data, optionally with the dask scheduler set in config
     logger.debug("Loading input data from NetCDF files...")
-    datasets_dict = \
-        load_netcdf_files(config.input_data_path, sector_requirements)
+    scheduler_config = {} if config.dask_scheduler is None else \
+        {'scheduler': config.dask_scheduler}
+    with dask.config.set(scheduler_config):
+        datasets_dict = load_netcdf_files(
+            config.input_data_path, sector_requirements, config.input_chunks,
+            config.load_workers
+            )
     logger.debug("Input data loading completed.")
 
     # check and preprocess input_data
@@ -97,6 +130,10 @@ def input_data_manager(config):
         )
 
     check_results_handling(check_logs)
+
+    # compute the lazy preprocessing of all input data in one pass
+    with dask.config.set(scheduler_config):
+        preprocessed_data = compute_preprocessed_data(preprocessed_data)
     logger.debug("Input data check and preprocessing completed.\n")
 
     return preprocessed_data, check_logs, datasets_dict, conventions
@@ -109,6 +146,9 @@ def load_conventions(convention_path):
     """
     Load conventions from a JSON file.
 
+    The parsed conventions are cached and only parsed again if the
+    modification time or size of the file changed.
+
     Parameters
     ----------
     convention_path : str
@@ -116,23 +156,63 @@ def load_conventions(convention_path):
 
     Returns
     -------
-    conventions : dict
-        Dictionary of conventions loaded from the JSON file.
+    conventions : types.MappingProxyType
+        Read-only mapping of the conventions loaded from the JSON file, with
+        nested objects converted by `freeze_conventions`. It is shared between
+        calls.
     """
+    convention_path = os.path.abspath(convention_path)
     try:
-        with open(convention_path, encoding="utf-8") as convention_file:
-            conventions = json.load(convention_file)
+        file_stat = os.stat(convention_path)
+        cache_key = \
+            (convention_path, file_stat.st_mtime_ns, file_stat.st_size)
+        if cache_key in CONVENTIONS_CACHE:
+            return CONVENTIONS_CACHE[cache_key]
+
+        with open(convention_path, "rb") as convention_file:
+            conventions = \
+                freeze_conventions(json_loads(convention_file.read()))
     except FileNotFoundError:
         logger.critical("Input data convention file not found.")  # Logging
         sys.exit()
 
+    CONVENTIONS_CACHE[cache_key] = conventions
     return conventions
 
 
-def load_netcdf_files(input_data_path, sector_requirements):
+def freeze_conventions(value):
+    """
+    Convert parsed JSON conventions recursively into read-only objects.
+
+    Parameters
+    ----------
+    value : dict, list or scalar
+        Parsed JSON value.
+
+    Returns
+    -------
+    frozen_value : types.MappingProxyType, tuple or scalar
+        Dictionaries are returned as read-only mappings, lists as tuples and
+        scalars unchanged.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType(
+            {key: freeze_conventions(item) for key, item in value.items()}
+            )
+    if isinstance(value, list):
+        return tuple(freeze_conventions(item) for item in value)
+    return value
+
+
+def load_netcdf_files(input_data_path, sector_requirements,
+                      chunks=None, max_workers=None):
     """
     Load NetCDF files by sector and variable into a nested dictionary.
 
+    If a variable directory contains a Zarr store (a '*.zarr' directory), the
+    store is opened instead of the NetCDF files. See `open_zarr_store`. The
+    program is aborted if the directory of a required sector is missing.
+
     Parameters
     ----------
     input_data_path : str
@@ -140,6 +220,14 @@ def load_netcdf_files(input_data_path, sector_requirements):
         and variable.
     sector_requirements : dict
         Dictionary containing expected sectors and variables.
+    chunks : dict, optional
+        Dask chunk sizes per dimension used for opening the files. Defaults to
+        INPUT_CHUNKS, the stored chunks of the files.
+    max_workers : int, optional
+        Maximum number of threads opening the files. Defaults to
+        MAX_LOAD_WORKERS. Small values limit the number of simultaneously
+        open files, e.g. for a low open file limit; the next variables are
+        then still opened while the loaded ones are processed.
 
     Returns
     -------
@@ -147,54 +235,273 @@ def load_netcdf_files(input_data_path, sector_requirements):
         A nested dictionary with sectors as keys, and each sector containing
         a dictionary of variables with xarray.Dataset objects as values.
     """
+    if chunks is None:
+        chunks = INPUT_CHUNKS
     datasets_dict = {}
-    # Loop through each sector in the input directory
-    for sector in os.listdir(input_data_path):
-        # Skip sectors not in the requirements dictionary
-        if sector not in sector_requirements:
-            continue
-        sector_path = os.path.join(input_data_path, sector)
-        expected_vars = sector_requirements[sector]['expected_vars']
-
-        # Check if the sector path is a directory
-        if os.path.isdir(sector_path):
-            datasets_dict[sector] = {}  # Initialize a dictionary for sector
-
-            # Loop through each variable in the sector directory
-            for variable in os.listdir(sector_path):
-                # Skip variables not in the expected list for the sector
-                if variable not in expected_vars:
+    load_tasks = []
+    # Abort if the directory of a required sector is missing, before any
+    # data are opened and checked
+    sector_paths = {sector: os.path.join(input_data_path, sector)
+                    for sector in sector_requirements}
+    missing_sectors = [sector for sector, sector_path in sector_paths.items()
+                       if not os.path.isdir(sector_path)]
+    if missing_sectors:
+        logger.critical("Required sector directories missing in %s: %s",
+                        input_data_path, ", ".join(missing_sectors))
+        sys.exit(1)
+
+    # Loop through each required sector
+    for sector, requirements in sector_requirements.items():
+        expected_vars = frozenset(requirements['expected_vars'])
+        datasets_dict[sector] = {}  # Initialize a dictionary for sector
+
+        # Loop through each variable in the sector directory. os.scandir
+        # caches the file type of each entry, so no extra stat call per entry
+        # is needed.
+        with os.scandir(sector_paths[sector]) as variable_entries:
+            for variable_entry in variable_entries:
+                # Skip variables not expected for the sector and files
+                variable = variable_entry.name
+                if variable not in expected_vars or \
+                        not variable_entry.is_dir():
                     continue
-                variable_path = os.path.join(sector_path, variable)
-
-                # Check if the variable path is a directory
-                if os.path.isdir(variable_path):
-                    # Get a list of all .nc files in the variable directory
-                    netcdf_files = \
-                        glob.glob(os.path.join(variable_path, '*.nc'))
-
-                    # If .nc files are found, load them as an xarray Dataset
-                    if netcdf_files:
-                        dataset = xr.open_mfdataset(
-                            netcdf_files, combine='by_coords'
-                        )
-                        datasets_dict[sector][variable] = dataset
-                        # Log a debug message for successful file loading
-                        logger.debug(
-                            ".nc-files loaded for '%s/%s'.", sector, variable
-                            )
+
+                # Get lists of all Zarr stores and .nc files in the
+                # variable directory
+                with os.scandir(variable_entry.path) as file_entries:
+                    file_entries = list(file_entries)
+                zarr_stores = sorted(
+                    file_entry.path for file_entry in file_entries
+                    if file_entry.name.endswith('.zarr')
+                    and file_entry.is_dir()
+                    )
+                netcdf_files = sorted(
+                    file_entry.path for file_entry in file_entries
+                    if file_entry.name.endswith('.nc')
+                    and file_entry.is_file()
+                    )
+
+                # A Zarr store takes precedence over .nc files
+                if zarr_stores:
+                    load_tasks.append(
+                        (sector, variable, zarr_stores[0], True))
+                elif netcdf_files:
+                    load_tasks.append(
+                        (sector, variable, netcdf_files, False))
+
+    if not load_tasks:
+        return datasets_dict
+
+    if max_workers is None:
+        max_workers = MAX_LOAD_WORKERS
+    # Opening files is I/O-bound, so the variables are loaded concurrently.
+    # Results are returned in task order and assigned in the main thread.
+    with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(load_tasks))) as executor:
+        datasets = executor.map(
+            lambda task: open_zarr_store(task[2], chunks) if task[3]
+            else open_netcdf_files(task[2], chunks), load_tasks
+            )
+        for (sector, variable, _, is_zarr), dataset in \
+                zip(load_tasks, datasets):
+            datasets_dict[sector][variable] = dataset
+            # Log a debug message for successful file loading
+            logger.debug("%s loaded for '%s/%s'.",
+                         "Zarr store" if is_zarr else ".nc-files",
+                         sector, variable)
 
     return datasets_dict
 
+
+def open_netcdf_files(netcdf_files, chunks):
+    """
+    Open the NetCDF files of one input variable as a single xarray.Dataset.
+
+    Parameters
+    ----------
+    netcdf_files : list of str
+        Paths to the NetCDF files of the variable.
+    chunks : dict
+        Dask chunk sizes per dimension. Dimensions missing in the files are
+        ignored.
+
+    Returns
+    -------
+    dataset : xarray.Dataset
+        Lazily loaded dataset.
+
+    Notes
+    -----
+    If every file has a 'time' dimension, the files are expected to split
+    the data sequentially in time. They are then concatenated along 'time'
+    in the order of their first time step, which avoids comparing the
+    coordinates of all files. Other coordinates must match exactly. Files
+    without a 'time' dimension are combined by their coordinates.
+    """
+    # A single file is opened directly without the combine machinery
+    if len(netcdf_files) == 1:
+        return open_netcdf_file(netcdf_files[0], chunks)
+
+    datasets = [open_netcdf_file(netcdf_file, chunks)
+                for netcdf_file in netcdf_files]
+    if all('time' in part.dims for part in datasets):
+        datasets.sort(key=lambda part: part.indexes['time'][0])
+        dataset = xr.combine_nested(
+            datasets, concat_dim='time', coords='minimal',
+            data_vars='minimal', compat='override', join='exact',
+            combine_attrs='override'
+            )
+    else:
+        dataset = xr.combine_by_coords(datasets, combine_attrs='override')
+    # Closing the combined dataset closes the files of all parts
+    dataset.set_close(lambda: [part.close() for part in datasets])
+    return dataset
+
+
+def open_netcdf_file(netcdf_file, chunks):
+    """
+    Open a single NetCDF file lazily with an engine matching its format.
+
+    NetCDF4 files are HDF5 files and are opened with h5netcdf, which can be
+    used from several threads at once. NetCDF3 files (classic and 64-bit
+    offset format) are opened with netCDF4 while holding NETCDF4_OPEN_LOCK.
+
+    Parameters
+    ----------
+    netcdf_file : str
+        Path to the NetCDF file.
+    chunks : dict
+        Dask chunk sizes per dimension.
+
+    Returns
+    -------
+    dataset : xarray.Dataset
+        Lazily loaded dataset.
+    """
+    # NetCDF3 files start with the magic number 'CDF'
+    with open(netcdf_file, 'rb') as file:
+        is_netcdf3 = file.read(3) == b'CDF'
+
+    if not is_netcdf3:
+        return xr.open_dataset(netcdf_file, chunks=chunks, engine='h5netcdf')
+    with NETCDF4_OPEN_LOCK:
+        return xr.open_dataset(netcdf_file, chunks=chunks, engine='netcdf4')
+
+
+def open_zarr_store(zarr_store, chunks):
+    """
+    Open the Zarr store of one input variable as xarray.Dataset.
+
+    Parameters
+    ----------
+    zarr_store : str
+        Path to the consolidated Zarr store of the variable.
+    chunks : dict
+        Dask chunk sizes per dimension.
+
+    Returns
+    -------
+    dataset : xarray.Dataset
+        Lazily loaded dataset.
+
+    Notes
+    -----
+    Opening one Zarr store only reads its consolidated metadata, instead of
+    the headers of all NetCDF files of a variable. The optional `zarr`
+    package is required. The NetCDF files of a variable can be converted once
+    with::
+
+        xr.open_mfdataset(netcdf_files).to_zarr(
+            'variable_dir/variable.zarr', consolidated=True)
+    """
+    dataset = xr.open_zarr(zarr_store, consolidated=True, chunks=chunks)
+    return dataset
+
+
+def compute_preprocessed_data(preprocessed_data):
+    """
+    Compute all dask-backed preprocessed input data in one pass.
+
+    The lazy loading and preprocessing steps of all variables are passed to
+    the dask scheduler at once, instead of being computed one by one when the
+    sector simulations access the data.
+
+    Parameters
+    ----------
+    preprocessed_data : dict
+        A nested dictionary with sectors as keys, and each sector containing
+        a dictionary of variables with preprocessed xarray.DataArray objects
+        as values.
+
+    Returns
+    -------
+    preprocessed_data : dict
+        The nested dictionary with numpy-backed xarray.DataArray objects.
+    """
+    lazy_data = [
+        (sector, variable, data)
+        for sector, variables in preprocessed_data.items()
+        for variable, data in variables.items()
+        if isinstance(data, xr.DataArray) and data.chunks is not None
+        ]
+    if not lazy_data:
+        return preprocessed_data
+
+    computed_data = dask.compute(*[data for _, _, data in lazy_data])
+    for (sector, variable, _), data in zip(lazy_data, computed_data):
+        preprocessed_data[sector][variable] = data
+    return preprocessed_data
+
+
 # =============================================================================
 # HANDLING FUNCTION FOR INPUT DATA CHECK RESULTS
 # =============================================================================
-
-
-def check_results_handling(check_logs):
+# Check categories whose issues abort the program, in order of handling
+CRITICAL_CHECK_ORDER = (
+    "too_many_vars",
+    "time_resolution_mismatch",
+    "missing_time_coords",
+    "missing_time_coverage",
+    "lat_lon_consistency",
+    )
+
+# Log messages for check categories whose issues abort the program
+CRITICAL_CHECK_MESSAGES = {
+    "too_many_vars": "Multiple variables found: %s",
+    "time_resolution_mismatch": "Time resolution mismatch: %s",
+    "missing_time_coords": "Time coordinates missing: %s",
+    }
+
+# Log levels and messages for check categories whose issues are only reported
+CHECK_MESSAGES = {
+    "unit_mismatch": (
+        logging.ERROR,
+        "Unit mismatch:\n Units in these files do not match expected units "
+        "for the sector as per input_data_convention.json.\n Please verify: "
+        "%s"
+        ),
+    "unknown_vars": (
+        logging.WARNING,
+        "Unknown variables:\n The following variables are not in "
+        "reference_names as specified in input_data_convention.json.\n "
+        "Please verify: %s"
+        ),
+    "missing_unit": (
+        logging.WARNING,
+        "Missing units:\n The following variables lack unit definitions "
+        "required by sector as per input_data_convention.json.\n Please "
+        "verify: %s"
+        ),
+    }
+
+
+def check_results_handling(check_logs, fail_fast=True):
     """
     Handle input data check results by logging and aborting if necessary.
 
+    Critical check categories are handled first in the order of
+    `CRITICAL_CHECK_ORDER`, the categories which are only reported afterwards.
+
     Parameters
     ----------
     check_logs : dict
@@ -221,85 +528,91 @@ def check_results_handling(check_logs):
         - "lat_lon_consistency" (bool): Indicates whether spatial coordinates
           are consistent across all input data (True if consistent, False
           otherwise).
+    fail_fast : bool, optional
+        If True (default), the program exits at the first critical category
+        without reporting the remaining categories. If False, all categories
+        are reported before exiting.
 
     """
     critical_error_found = False
-
-    # Handle critical errors
-    # Process each category in the check results
-    for category, result in check_logs.items():
-        if isinstance(result, list) and result:  # Only process non-empty lists
-            issues_list = "\n   - " + "\n   - ".join(result)
-            if category == "too_many_vars":
-                logger.critical("Multiple variables found: %s", issues_list)
-                critical_error_found = True
-            elif category == "time_resolution_mismatch":
-                logger.critical("Time resolution mismatch: %s", issues_list)
-                critical_error_found = True
-            elif category == "missing_time_coords":
-                logger.critical("Time coordinates missing: %s", issues_list)
-                critical_error_found = True
-            elif category == "missing_time_coverage":
-                missing_paths = \
-                    set(check_logs["missing_time_coverage"])
-                extended_paths = \
-                    set(check_logs["extended_time_period"])
-                unmatched_paths = missing_paths - extended_paths
-                if not unmatched_paths:
-                    extended_list = \
-                        "\n   - " + "\n   - ".join(extended_paths)
-                    logger.info(
-                        "Time coverage missing but data are extended: %s",
-                        extended_list
-                        )
-                else:
-                    logger.critical("Time coverage missing for: %s",
-                                    issues_list
-                                    )
-                    critical_error_found = True
-            # Handle individual warning categories with custom messages
-            elif category == "unit_mismatch":
-                logger.error(
-                    "Unit mismatch:\n Units in these files do not match "
-                    "expected units for the sector as per "
-                    "input_data_convention.json.\n Please verify: %s",
-                    issues_list
-                    )
-            elif category == "unknown_vars":
-                logger.warning(
-                    "Unknown variables:\n The following variables are not in "
-                    "reference_names as specified in input_data_convention"
-                    ".json.\n Please verify: %s", issues_list
+    # Categories without issues are collected and logged in one message
+    no_issue_categories = []
+    # Input data missing time coverage which were not extended
+    extended_paths = set(check_logs.get("extended_time_period", ()))
+    unmatched_paths = \
+        set(check_logs.get("missing_time_coverage", ())) - extended_paths
+
+    # 1. Process critical categories in priority order
+    for category in CRITICAL_CHECK_ORDER:
+        result = check_logs.get(category)
+        if category == "lat_lon_consistency":
+            if result is False:
+                logger.critical(
+                    "Spatial coordinates are not equal for all input data"
                     )
-            elif category == "missing_unit":
-                logger.warning(
-                    "Missing units:\n The following variables lack unit "
-                    "definitions required by sector as per "
-                    "input_data_convention.json.\n Please verify: %s",
-                    issues_list
+                critical_error_found = True
+            elif result is not None:
+                logger.debug("%s: %s", category, result)
+        elif not result:
+            if result is not None:
+                no_issue_categories.append(category)
+        elif category == "missing_time_coverage":
+            if not unmatched_paths:
+                logger.info(
+                    "Time coverage missing but data are extended: %s",
+                    format_issues_list(extended_paths)
                     )
-
-        elif isinstance(result, bool):
-            # Handle lat/lon consistency check
-            if category == "lat_lon_consistency":
-                if not result:
-                    logger.critical(
-                        "Spatial coordinates are not equal for all input data"
-                        )
-                    critical_error_found = True
-                else:
-                    logger.debug("%s: %s", category, result)
-
-        elif isinstance(result, list) and not result:
-            # Empty lists are only informational
-            if category == "extended_time_period":
-                pass
             else:
-                logger.debug("%s: No issues detected", category)
+                logger.critical("Time coverage missing for: %s",
+                                format_issues_list(result)
+                                )
+                critical_error_found = True
+        else:
+            logger.critical(CRITICAL_CHECK_MESSAGES[category],
+                            format_issues_list(result))
+            critical_error_found = True
+
+        if critical_error_found and fail_fast:
+            exit_on_critical_errors()
+
+    # 2. Process categories whose issues are only reported
+    for category, (log_level, message) in CHECK_MESSAGES.items():
+        result = check_logs.get(category)
+        if result:
+            logger.log(log_level, message, format_issues_list(result))
+        elif result is not None:
+            no_issue_categories.append(category)
+
+    if no_issue_categories:
+        logger.debug("No issues detected for: %s",
+                     ", ".join(no_issue_categories))
 
     # Check if critical errors were found and exit the program if necessary
     if critical_error_found:
-        logger.critical(
-            "Critical errors were found during input data checks. "
-            "Exiting program.")
-        sys.exit(1)
+        exit_on_critical_errors()
+
+
+def exit_on_critical_errors():
+    """Log that critical input data errors were found and exit the program."""
+    logger.critical(
+        "Critical errors were found during input data checks. "
+        "Exiting program.")
+    sys.exit(1)
+
+
+def format_issues_list(issues):
+    """
+    Format issues of a check category as an indented list for logging.
+
+    Parameters
+    ----------
+    issues : iterable of str
+        The issues, e.g. the log ids of the affected input data.
+
+    Returns
+    -------
+    issues_list : str
+        The issues, each on a new line with a leading dash.
+    """
+    separator = "\n   - "
+    return separator + separator.join(issues)
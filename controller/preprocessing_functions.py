@@ -10,7 +10,8 @@
 # =============================================================================
 """GWSWUSE preprocessing functions for input_data_check_preprocessing."""
 
-import dask
+from numba import njit, prange
+import dask.array as da
 import xarray as xr
 import pandas as pd
 import numpy as np
@@ -25,7 +26,8 @@ def ensure_correct_dimension_order(data):
 
     This function checks and, if necessary, transposes the dimensions of the
     input xarray object to follow the preferred order of ("time", "lat", "lon")
-    if "time" is present or ("lat", "lon") otherwise.
+    if "time" is present or ("lat", "lon") otherwise. For Datasets, only the
+    multi-dimensional data variables in a different order are transposed.
 
     Parameters
     ----------
@@ -37,26 +39,59 @@ def ensure_correct_dimension_order(data):
     data : xarray.DataArray or xarray.Dataset
         The xarray object with dimensions in the desired order.
     """
-    # Get the current dimensions of the xarray object
-    current_dims = tuple(data.dims)
-
-    # Check if 'time' is a dimension
-    if 'time' in current_dims:
-        # Desired order if 'time' is present
-        desired_dims = ("time", "lat", "lon")
-    else:
-        # Desired order if 'time' is not present
-        desired_dims = ("lat", "lon")
+    if isinstance(data, xr.Dataset):
+        # Transpose data variables separately, as the dimension order of a
+        # Dataset does not reflect the order of its variables
+        reordered_vars = {
+            name: ensure_correct_dimension_order(variable)
+            for name, variable in data.data_vars.items()
+            if variable.ndim > 1
+            and variable.dims != get_desired_dims(variable.dims)
+            }
+        return data.assign(reordered_vars) if reordered_vars else data
+
+    # Get the current and desired dimensions of the xarray object
+    current_dims = data.dims
+    desired_dims = get_desired_dims(current_dims)
 
     # Check if current dimensions match the desired order
     if current_dims != desired_dims:
-        # Transpose the xarray object to the desired order
-        data = data.transpose(*desired_dims)
+        if isinstance(data, xr.DataArray) and data.chunks is None:
+            # For numpy-backed DataArrays only the axes are permuted, which
+            # changes the strides of the array without copying the data
+            axes_perm = [current_dims.index(dim) for dim in desired_dims]
+            data = xr.DataArray(
+                np.transpose(data.values, axes_perm), coords=data.coords,
+                dims=desired_dims, name=data.name, attrs=data.attrs
+                )
+        else:
+            # Transpose the xarray object to the desired order
+            data = data.transpose(*desired_dims)
 
     # Return the transposed xarray object
     return data
 
 
+def get_desired_dims(dims):
+    """
+    Get the preferred dimension order for the given dimensions.
+
+    Parameters
+    ----------
+    dims : tuple of str
+        The current dimensions.
+
+    Returns
+    -------
+    tuple of str
+        ("time", "lat", "lon") if "time" is in `dims`, ("lat", "lon")
+        otherwise.
+    """
+    if 'time' in dims:
+        return ("time", "lat", "lon")
+    return ("lat", "lon")
+
+
 def sort_lat_desc_lon_asc_coords(data):
     """
     Sort xarray object latitude descending and longitude ascending.
@@ -76,15 +111,51 @@ def sort_lat_desc_lon_asc_coords(data):
     if 'lat' not in data.coords or 'lon' not in data.coords:
         raise ValueError("'lat' or 'lon' coords miss in dataset.")
 
-    with dask.config.set(**{'array.slicing.split_large_chunks': True}):
-        sorted_lat_desc_data = data.sortby('lat', ascending=False)
+    # Both coordinates are sorted with one indexing operation instead of two
+    # sortby calls, and not at all if they are already in the desired order
+    indexers = {}
+    lat_indexer = get_sort_indexer(data['lat'].values, ascending=False)
+    if lat_indexer is not None:
+        indexers['lat'] = lat_indexer
+    lon_indexer = get_sort_indexer(data['lon'].values, ascending=True)
+    if lon_indexer is not None:
+        indexers['lon'] = lon_indexer
+    if not indexers:
+        return data
 
-        sorted_lat_desc_lon_asc_data = \
-            sorted_lat_desc_data.sortby('lon', ascending=True)
+    sorted_lat_desc_lon_asc_data = data.isel(indexers)
 
     return sorted_lat_desc_lon_asc_data
 
 
+def get_sort_indexer(values, ascending=True):
+    """
+    Get the indexer which sorts 1D coordinate values.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The coordinate values.
+    ascending : bool, optional
+        Sort order of the values. Default is True.
+
+    Returns
+    -------
+    indexer : slice or numpy.ndarray or None
+        None if the values are already sorted, a reversing slice if they are
+        sorted in the opposite order and a stable argsort otherwise.
+    """
+    steps = np.diff(values)
+    if not ascending:
+        steps = -steps
+    if np.all(steps >= 0):
+        return None
+    if np.all(steps <= 0):
+        return slice(None, None, -1)
+    order = np.argsort(values if ascending else -values, kind='stable')
+    return order
+
+
 def trim_xr_data(data, start_year, end_year):
     """
     Trim DataArray to cover the specified period.
@@ -103,7 +174,50 @@ def trim_xr_data(data, start_year, end_year):
     trimmed_data : xr.DataArray
         The trimmed DataArray.
     """
-    trimmed_data = data.sel(time=slice(str(start_year), str(end_year)))
+    time_values = data['time'].values
+    if np.issubdtype(time_values.dtype, np.datetime64):
+        # Integer bounds of the period are found by binary search on the
+        # datetime64 values, without label indexing via a pandas index
+        period_bounds = np.array(
+            [f'{start_year}-01-01', f'{end_year + 1}-01-01'],
+            dtype=time_values.dtype
+            )
+        start_index, end_index = np.searchsorted(time_values, period_bounds)
+        trimmed_data = data.isel(time=slice(start_index, end_index))
+    else:
+        trimmed_data = data.sel(time=slice(str(start_year), str(end_year)))
+    # Inputs split over several files are loaded with one time chunk per
+    # file, the trimmed period is merged into a single time chunk
+    if len(trimmed_data.chunksizes.get('time', ())) > 1:
+        trimmed_data = trimmed_data.chunk({'time': -1})
+    return trimmed_data
+
+
+def trim_and_reorder_xr_data(data, start_year, end_year):
+    """
+    Trim xarray object to the specified period and reorder its dimensions.
+
+    Time selection and transposition are chained on the still lazy object,
+    so that only one combined dask graph is built for both steps.
+
+    Parameters
+    ----------
+    data : xr.DataArray or xr.Dataset
+        The original xarray object with time values.
+    start_year : int
+        The year from which the trimming begins.
+    end_year : int
+        The year until which the trimming continues.
+
+    Returns
+    -------
+    trimmed_data : xr.DataArray or xr.Dataset
+        The trimmed xarray object with dimensions ordered as
+        ("time", "lat", "lon").
+    """
+    trimmed_data = ensure_correct_dimension_order(
+        trim_xr_data(data, start_year, end_year)
+        )
     return trimmed_data
 
 
@@ -111,6 +225,12 @@ def extend_xr_data(data, start_year, end_year, time_freq):
     """
     Extend DataArray or Dataset to cover the specified period.
 
+    The first and last block of time slices are repeated and concatenated
+    with the original data in one `xr.concat`, which keeps dask-backed data
+    lazy. Only if the original time steps do not match the target time steps,
+    the extension is done on one numpy array holding all data variables,
+    which is wrapped into an xarray object once at the end.
+
     Parameters
     ----------
     data : xr.DataArray or xr.Dataset
@@ -128,160 +248,404 @@ def extend_xr_data(data, start_year, end_year, time_freq):
     extended_data : xr.DataArray or xr.Dataset
         The extended DataArray or Dataset.
     """
+    data = ensure_correct_dimension_order(data)
     original_time = data.coords['time']
     start_date, end_date = f'{start_year}-01-01', f'{end_year}-12-31'
     freq = 'MS' if time_freq == 'monthly' else 'YS'
     target_time = pd.date_range(start=start_date, end=end_date, freq=freq)
 
-    extended_data = initialize_extended_data(data, target_time)
-
     number_time_slices = 12 if freq == 'MS' else 1
 
-    extended_data = append_data_to_start(
-        data, extended_data, target_time, number_time_slices
+    # Locate the original period within the target time once: target steps
+    # before n_prepend precede the data, steps from append_from follow it
+    target_ns = target_time.values.astype('datetime64[ns]')
+    original_ns = original_time.values.astype('datetime64[ns]')
+    n_prepend = np.searchsorted(target_ns, original_ns[0])
+    append_from = np.searchsorted(target_ns, original_ns[-1], side='right')
+
+    # Data already covering the target period only need to be trimmed
+    if n_prepend == 0 and append_from == len(target_time):
+        return trim_xr_data(data, start_year, end_year)
+
+    # Repeated blocks are concatenated lazily to the original data instead of
+    # allocating and filling a buffer for the whole target period
+    extended_data = concat_extended_data(
+        data, target_time, n_prepend, append_from, number_time_slices
         )
-    extended_data = append_data_to_end(
-        data, extended_data, target_time, number_time_slices
+    if extended_data is not None:
+        return extended_data
+
+    variables, source_stack = stack_data_variables(data)
+
+    if isinstance(source_stack, da.Array):
+        # Dask-backed data are extended lazily chunk by chunk, each chunk
+        # holding the whole time series of its grid cells
+        source_stack = source_stack.rechunk({1: -1})
+        extended_stack = source_stack.map_blocks(
+            extend_stack, original_time, target_time, n_prepend,
+            append_from, number_time_slices, freq,
+            chunks=(source_stack.chunks[0], (len(target_time),),
+                    *source_stack.chunks[2:]),
+            meta=np.empty((0, 0, 0, 0), dtype=source_stack.dtype)
+            )
+    else:
+        extended_stack = extend_stack(
+            source_stack, original_time, target_time, n_prepend,
+            append_from, number_time_slices, freq
+            )
+
+    extended_data = wrap_extended_data(
+        data, variables, extended_stack, target_time
         )
-    extended_data = insert_original_data(data, extended_data, original_time)
 
     return extended_data
 
 
-def initialize_extended_data(data, target_time):
+def concat_extended_data(data, target_time, n_prepend, append_from,
+                         number_time_slices):
     """
-    Initialize an extended DataArray or Dataset to match the target time.
+    Extend an xarray object by concatenating repeated head and tail blocks.
+
+    The first and last block of time slices are repeated lazily and
+    concatenated with the part of the original data within the target period,
+    so dask-backed data stay lazy.
 
     Parameters
     ----------
     data : xr.DataArray or xr.Dataset
-        The original DataArray or Dataset.
+        The original DataArray or Dataset with time as first dimension.
     target_time : pd.DatetimeIndex
-        The time coordinates for the extended DataArray or Dataset.
+        The time coordinates for the extended data.
+    n_prepend : int
+        The number of target time steps before the start of the original data.
+    append_from : int
+        The index of the first target time step after the end of the original
+        data.
+    number_time_slices : int
+        The number of time slices of the repeated blocks.
 
     Returns
     -------
-    extended_data : xr.DataArray or xr.Dataset
-        The initialized extended DataArray or Dataset.
+    extended_data : xr.DataArray or xr.Dataset or None
+        The extended DataArray or Dataset, or None if the original time steps
+        do not match the target time steps.
+    """
+    original_ns = data.coords['time'].values.astype('datetime64[ns]')
+    target_ns = target_time.values.astype('datetime64[ns]')
+    in_target = slice(np.searchsorted(original_ns, target_ns[0]),
+                      np.searchsorted(original_ns, target_ns[-1],
+                                      side='right'))
+    if not np.array_equal(original_ns[in_target],
+                          target_ns[n_prepend:append_from]):
+        return None
+
+    parts = []
+    if n_prepend > 0:
+        parts.append(repeat_time_block(
+            data.isel(time=slice(0, number_time_slices)), n_prepend))
+    parts.append(data.isel(time=in_target))
+    if append_from < len(target_time):
+        parts.append(repeat_time_block(
+            data.isel(time=slice(-number_time_slices, None)),
+            len(target_time) - append_from))
+
+    extended_data = xr.concat(parts, dim='time').assign_coords(
+        time=target_time)
+    return extended_data
+
+
+def repeat_time_block(block, length):
+    """
+    Repeat a block of time slices lazily up to the given length.
+
+    Parameters
+    ----------
+    block : xr.DataArray or xr.Dataset
+        The block of time slices to repeat.
+    length : int
+        The number of time slices of the result.
+
+    Returns
+    -------
+    repeated_block : xr.DataArray or xr.Dataset
+        The repeated block, cut to `length` time slices.
+    """
+    n_repeats = -(-length // block.sizes['time'])
+    repeated_block = xr.concat([block] * n_repeats, dim='time').isel(
+        time=slice(0, length))
+    return repeated_block
+
+
+def stack_data_variables(data):
+    """
+    Stack the data variables of an xarray object into one array.
+
+    Parameters
+    ----------
+    data : xr.DataArray or xr.Dataset
+        The original DataArray or Dataset with time as first dimension.
+
+    Returns
+    -------
+    variables : list
+        The names of the stacked variables.
+    source_stack : np.ndarray or dask.array.Array
+        The data of all variables stacked along a new first axis, i.e. with
+        the shape (variables, time, lat, lon). A single variable is not
+        copied, dask-backed data are stacked lazily.
     """
-    extended_data = None
     if isinstance(data, xr.DataArray):
-        extended_data = xr.DataArray(
-            np.empty((len(target_time), *data.shape[1:])),
-            coords=[target_time, *list(data.coords.values())[1:]],
-            dims=data.dims
+        variables = [data.name]
+        arrays = [data.data]
+    else:
+        variables = list(data.data_vars)
+        arrays = [data[var].data for var in variables]
+
+    if len(arrays) == 1:
+        source_stack = arrays[0][np.newaxis]
+    elif any(isinstance(array, da.Array) for array in arrays):
+        source_stack = da.stack(arrays)
+    else:
+        source_stack = np.stack(arrays)
+    return variables, source_stack
+
+
+def extend_stack(source_stack, original_time, target_time, n_prepend,
+                 append_from, number_time_slices, freq):
+    """
+    Extend the stacked data of the original variables to the target time.
+
+    Parameters
+    ----------
+    source_stack : np.ndarray
+        The stacked data of the original variables with time as second axis.
+    original_time : xr.DataArray
+        The time coordinates of the original DataArray or Dataset.
+    target_time : pd.DatetimeIndex
+        The time coordinates for the extended data.
+    n_prepend : int
+        The number of target time steps before the start of the original data.
+    append_from : int
+        The index of the first target time step after the end of the original
+        data.
+    number_time_slices : int
+        The number of time slices to append at each step.
+    freq : str
+        The frequency of the target time, either 'MS' or 'YS'.
+
+    Returns
+    -------
+    extended_stack : np.ndarray
+        The stacked data extended to the length of the target time.
+    """
+    extended_stack = initialize_extended_data(source_stack, target_time)
+
+    extended_stack = append_data_to_start(
+        source_stack, extended_stack, n_prepend, number_time_slices
         )
-    elif isinstance(data, xr.Dataset):
-        extended_data = xr.Dataset(
-            {var: (data.dims, np.empty((len(target_time), *data.shape[1:])))
-             for var, data in data.data_vars.items()},
-            coords={coord: ([coord], target_time) if coord == 'time' else
-                    (coord, data.values)
-                    for coord, data in data.coords.items()}
+    extended_stack = append_data_to_end(
+        source_stack, extended_stack, append_from, number_time_slices
         )
-
-    return extended_data
+    extended_stack = insert_original_data(
+        source_stack, extended_stack, original_time, target_time, freq
+        )
+    return extended_stack
 
 
-def append_data_to_start(data, extended_data, target_time, number_time_slices):
+def initialize_extended_data(source_stack, target_time):
     """
-    Append data to the start of the extended DataArray or Dataset.
+    Initialize an extended numpy array to match the target time.
 
     Parameters
     ----------
-    data : xr.DataArray or xr.Dataset
-        The original DataArray or Dataset.
-    extended_data : xr.DataArray or xr.Dataset
-        The extended DataArray or Dataset being built.
+    source_stack : np.ndarray
+        The stacked data of the original variables with time as second axis.
     target_time : pd.DatetimeIndex
-        The time coordinates for the extended DataArray or Dataset.
+        The time coordinates for the extended data.
+
+    Returns
+    -------
+    extended_stack : np.ndarray
+        Uninitialized array with the length of the target time as second axis.
+    """
+    extended_stack = np.empty(
+        (source_stack.shape[0], len(target_time), *source_stack.shape[2:]),
+        dtype=source_stack.dtype
+        )
+    return extended_stack
+
+
+def append_data_to_start(source_stack, extended_stack, n_prepend,
+                         number_time_slices):
+    """
+    Append data to the start of the extended array.
+
+    Parameters
+    ----------
+    source_stack : np.ndarray
+        The stacked data of the original variables with time as second axis.
+    extended_stack : np.ndarray
+        The extended array being built.
+    n_prepend : int
+        The number of target time steps before the start of the original data.
     number_time_slices : int
         The number of time slices to append at each step.
 
     Returns
     -------
-    extended_data : xr.DataArray or xr.Dataset
-        The extended DataArray or Dataset after data has been appended to the
-        start.
-    """
-    for i in range(0, len(target_time), number_time_slices):
-        if target_time[i] >= data.coords['time'][0]:
-            break
-        if isinstance(data, xr.DataArray):
-            extended_data[i:i+number_time_slices] = (
-                data.isel(time=slice(0, number_time_slices)).values
+    extended_stack : np.ndarray
+        The extended array after data has been appended to the start.
+    """
+    for source, extended in zip(source_stack, extended_stack):
+        fill_periodic_blocks(
+            extended, source[:number_time_slices], 0, n_prepend
             )
-        elif isinstance(data, xr.Dataset):
-            for var in data.data_vars:
-                extended_data[var][i:i+number_time_slices] = (
-                    data[var].isel(time=slice(0, number_time_slices)).values
-                )
-    return extended_data
+    return extended_stack
 
 
-def append_data_to_end(data, extended_data, target_time, number_time_slices):
+def append_data_to_end(source_stack, extended_stack, append_from,
+                       number_time_slices):
     """
-    Append data to the end of the extended DataArray or Dataset.
+    Append data to the end of the extended array.
 
     Parameters
     ----------
-    data : xr.DataArray or xr.Dataset
-        The original DataArray or Dataset.
-    extended_data : xr.DataArray or xr.Dataset
-        The extended DataArray or Dataset being built.
-    target_time : pd.DatetimeIndex
-        The time coordinates for the extended DataArray or Dataset.
+    source_stack : np.ndarray
+        The stacked data of the original variables with time as second axis.
+    extended_stack : np.ndarray
+        The extended array being built.
+    append_from : int
+        The index of the first target time step after the end of the original
+        data.
     number_time_slices : int
         The number of time slices to append at each step.
 
     Returns
     -------
-    extended_data : xr.DataArray or xr.Dataset
-        The extended DataArray or Dataset after data has been appended to the
-        end.
-    """
-    for i in range(len(target_time) - number_time_slices, -1,
-                   -number_time_slices):
-        if target_time[i] <= data.coords['time'][-1]:
-            break
-        if isinstance(data, xr.DataArray):
-            extended_data[i:i+number_time_slices] = (
-                data.isel(time=slice(-number_time_slices, None)).values
+    extended_stack : np.ndarray
+        The extended array after data has been appended to the end.
+    """
+    for source, extended in zip(source_stack, extended_stack):
+        fill_periodic_blocks(
+            extended, source[-number_time_slices:], append_from,
+            len(extended)
             )
-        elif isinstance(data, xr.Dataset):
-            for var in data.data_vars:
-                extended_data[var][i:i+number_time_slices] = (
-                    data[var].isel(time=slice(-number_time_slices, None)
-                                   ).values)
 
-    return extended_data
+    return extended_stack
 
 
-def insert_original_data(data, extended_data, original_time):
+def insert_original_data(source_stack, extended_stack, original_time,
+                         target_time, freq):
     """
-    Insert the original data into the extended DataArray or Dataset.
+    Insert the original data into the extended array.
+
+    All variables are written with one assignment on the stacked arrays. The
+    target index of each original time step is computed arithmetically as the
+    number of months or years since the start of the target time.
 
     Parameters
     ----------
-    data : xr.DataArray or xr.Dataset
-        The original DataArray or Dataset.
-    extended_data : xr.DataArray or xr.Dataset
-        The extended DataArray or Dataset being built.
+    source_stack : np.ndarray
+        The stacked data of the original variables with time as second axis.
+    extended_stack : np.ndarray
+        The extended array being built.
     original_time : xr.DataArray
         The time coordinates of the original DataArray or Dataset.
+    target_time : pd.DatetimeIndex
+        The time coordinates for the extended data.
+    freq : str
+        The frequency of the target time, either 'MS' or 'YS'.
+
+    Returns
+    -------
+    extended_stack : np.ndarray
+        The extended array with original data inserted.
+    """
+    time_unit = 'M' if freq == 'MS' else 'Y'
+    original_time_index = (
+        original_time.values.astype(f'datetime64[{time_unit}]')
+        - target_time.values[0].astype(f'datetime64[{time_unit}]')
+        ).astype(np.int64)
+    # Original time steps outside the target period are not inserted
+    source_index = np.flatnonzero((original_time_index >= 0) &
+                                  (original_time_index < len(target_time)))
+    target_index = original_time_index[source_index]
+    if len(target_index) == 0:
+        return extended_stack
+
+    # Contiguous time steps are copied as slices instead of fancy indexing
+    if np.all(np.diff(target_index) == 1) and \
+            np.all(np.diff(source_index) == 1):
+        target_index = slice(target_index[0], target_index[-1] + 1)
+        source_index = slice(source_index[0], source_index[-1] + 1)
+
+    extended_stack[:, target_index] = source_stack[:, source_index]
+
+    return extended_stack
+
+
+def wrap_extended_data(data, variables, extended_stack, target_time):
+    """
+    Wrap the extended numpy array into an xarray object like the original.
+
+    Parameters
+    ----------
+    data : xr.DataArray or xr.Dataset
+        The original DataArray or Dataset.
+    variables : list
+        The names of the stacked variables.
+    extended_stack : np.ndarray
+        The extended data of all variables, stacked along the first axis.
+    target_time : pd.DatetimeIndex
+        The time coordinates for the extended data.
 
     Returns
     -------
     extended_data : xr.DataArray or xr.Dataset
-        The extended DataArray or Dataset with original data inserted.
+        The extended DataArray or Dataset with the attributes of the original.
     """
-    original_time_index = extended_data.time.to_index().get_indexer(
-        original_time.to_index()
-    )
+    coords = {'time': target_time}
+    coords.update({name: coord for name, coord in data.coords.items()
+                   if 'time' not in coord.dims})
+
     if isinstance(data, xr.DataArray):
-        extended_data[original_time_index] = data.values
-    elif isinstance(data, xr.Dataset):
-        for var in data.data_vars:
-            extended_data[var][original_time_index] = data[var].values
+        extended_data = xr.DataArray(
+            extended_stack[0], coords=coords, dims=data.dims,
+            name=data.name, attrs=data.attrs
+            )
+    else:
+        extended_data = xr.Dataset(
+            {var: (data[var].dims, extended, data[var].attrs)
+             for var, extended in zip(variables, extended_stack)},
+            coords=coords, attrs=data.attrs
+            )
 
     return extended_data
+
+
+@njit(parallel=True, cache=True)
+def fill_periodic_blocks(buffer, block, start, stop):
+    """
+    Fill a time range of a buffer by repeating a block of time slices.
+
+    The blocks are copied in parallel, each block into its own disjoint part
+    of the buffer.
+
+    Parameters
+    ----------
+    buffer : np.ndarray
+        The array to fill, with time as first axis.
+    block : np.ndarray
+        The time slices to repeat, e.g. the first or last year of the data.
+    start : int
+        The first time index of the buffer to fill.
+    stop : int
+        The time index up to which the buffer is filled (exclusive). If the
+        range is not a multiple of the block length, the last block is cut.
+    """
+    block_len = block.shape[0]
+    n_blocks = (stop - start + block_len - 1) // block_len
+    for k in prange(n_blocks):
+        block_start = start + k * block_len
+        block_stop = min(block_start + block_len, stop)
+        buffer[block_start:block_stop] = block[:block_stop - block_start]
@@ -10,7 +10,6 @@
 # =============================================================================
 """GWSWUSE irrigation simulation module."""
 
-import xarray as xr
 from gwswuse_logger import get_logger
 from model import model_equations as me
 from model import utils as ut
@@ -94,6 +93,7 @@ class IrrigationSimulator:
         self.sector_name = 'irrigation'
         # Initialize configuration settings
         self.csp_flag = config.cell_specific_output['flag']
+        float_precision = config.float_precision
 
         self.irrigation_input_based_on_aei = \
             config.irrigation_input_based_on_aei
@@ -108,25 +108,22 @@ class IrrigationSimulator:
         self.unit = irr_data['unit']
 
         # Set total consumptive use input [m3/month]
-        self.consumptive_use_tot = irr_data['consumptive_use_tot'].values
+        self.consumptive_use_tot = ut.set_float_precision(
+            irr_data['consumptive_use_tot'].values, float_precision)
 
         # Set fraction of groundwater use, default to 0 if not provided
-        self.fraction_gw_use = \
-            (irr_data['fraction_gw_use'].values
-             if 'fraction_gw_use' in irr_data and
-             isinstance(irr_data['fraction_gw_use'], xr.DataArray)
-             else 0)
+        self.fraction_gw_use = ut.set_float_precision(
+            ut.get_values_or_zero(irr_data, 'fraction_gw_use'),
+            float_precision)
         if isinstance(self.fraction_gw_use, int) and self.fraction_gw_use == 0:
             logger.info(
                 "fraction_gw_use for %s is set to 0 by default. Differs from "
                 "WaterGAP 2.2e", self.sector_name
                 )
         # Set fraction of groundwater return, default to 0 if not provided
-        self.fraction_return_gw = \
-            (irr_data['fraction_return_gw'].values
-             if 'fraction_return_gw' in irr_data and
-             isinstance(irr_data['fraction_return_gw'], xr.DataArray)
-             else 0)
+        self.fraction_return_gw = ut.set_float_precision(
+            ut.get_values_or_zero(irr_data, 'fraction_return_gw'),
+            float_precision)
         if (isinstance(self.fraction_return_gw, int) and
             self.fraction_return_gw == 0):
             logger.info(
@@ -143,21 +140,25 @@ class IrrigationSimulator:
                 irr_data['abstraction_irr_part_mask'].values
 
             # Determine deficit irrigation locations
-            self.deficit_irrigation_location = me.set_irr_deficit_locations(
-                self.gwd_mask, self.abstraction_irr_part_mask,
-                self.deficit_irrigation_factor)
+            self.deficit_irrigation_location = ut.set_float_precision(
+                me.set_irr_deficit_locations(
+                    self.gwd_mask, self.abstraction_irr_part_mask,
+                    self.deficit_irrigation_factor),
+                float_precision)
 
         if self.irrigation_input_based_on_aei:
             # Set fraction_aai_aei
-            self.fraction_aai_aei = irr_data['fraction_aai_aei'].values
+            self.fraction_aai_aei = ut.set_float_precision(
+                irr_data['fraction_aai_aei'].values, float_precision)
 
         if self.correct_irrigation_t_aai_mode:
             # Set time factor
-            self.time_factor_aai = irr_data['time_factor_aai'].values
+            self.time_factor_aai = ut.set_float_precision(
+                irr_data['time_factor_aai'].values, float_precision)
 
         # Set surface water efficiency
-        self.irrigation_efficiency_sw = \
-            irr_data['irrigation_efficiency_sw'].values
+        self.irrigation_efficiency_sw = ut.set_float_precision(
+            irr_data['irrigation_efficiency_sw'].values, float_precision)
 
         # Determine groundwater efficiency based on surface water efficiency
         self.irrigation_efficiency_gw = \
@@ -166,7 +167,7 @@ class IrrigationSimulator:
                                      self.efficiency_gw_mode)
 
         # Store the coordinates for transfer back to xr.DataArray
-        self.coords = irr_data['consumptive_use_tot'].coords
+        self.coords = ut.get_coords(irr_data['consumptive_use_tot'])
 
         # print headline for cell simulation prints
         ut.print_cell_output_headline(
@@ -192,141 +193,70 @@ class IrrigationSimulator:
             self.consumptive_use_tot, 'consumptive_use_tot', self.coords_idx,
             self.unit, self.csp_flag
             )
-
-        # Calc total consumptive use in irrigation for area actually irrigated
+        # Collect the factors of the enabled corrections of total consumptive
+        # use, they are applied within the fused irrigation kernel
+        correction_factors = {}
         if self.irrigation_input_based_on_aei:
-            self.consumptive_use_tot = \
-                me.calc_irr_consumptive_use_aai(
-                    self.consumptive_use_tot,
-                    self.fraction_aai_aei
-                    )
-            ut.print_cell_value(
-                self.fraction_aai_aei, 'fraction_aai_aei', self.coords_idx,
-                flag=self.csp_flag
-                )
-            ut.print_cell_value(
-                self.consumptive_use_tot, 'consumptive_use_tot corrected by '
-                'fraction_aai_aei', self.coords_idx, self.unit, self.csp_flag
-                )
-
+            correction_factors['fraction_aai_aei'] = self.fraction_aai_aei
         if self.deficit_irrigation_mode:
-            # Calc deficit total consumptive use in irrigation
-            self.consumptive_use_tot = \
-                me.calc_irr_deficit_consumptive_use_tot(
-                    self.consumptive_use_tot,
-                    self.deficit_irrigation_location
-                    )
-            ut.print_cell_value(
-                self.gwd_mask, 'gwd_mask', self.coords_idx, 'bool',
-                self.csp_flag
-                )
-            ut.print_cell_value(
-                self.abstraction_irr_part_mask, 'abstraction_irr_part_mask',
-                self.coords_idx, 'bool', self.csp_flag
-                )
-            ut.print_cell_value(
-                self.deficit_irrigation_location,
-                'deficit_irrigation_location_factor',
-                self.coords_idx, flag=self.csp_flag
-                )
-            ut.print_cell_value(
-                self.consumptive_use_tot, 'consumptive_use_tot_deficit',
-                self.coords_idx, self.unit, self.csp_flag
-                )
-
-        # Correct total consumptive use by time dev for area actually irrigated
+            correction_factors['deficit_irrigation_location'] = \
+                self.deficit_irrigation_location
         if self.correct_irrigation_t_aai_mode:
-            self.consumptive_use_tot = \
-                me.correct_irr_consumptive_use_by_t_aai(
-                    self.consumptive_use_tot, self.time_factor_aai
-                    )
-            ut.print_cell_value(
-                self.time_factor_aai, 'time_factor_aai', self.coords_idx,
-                flag=self.csp_flag
-                )
-            ut.print_cell_value(
-                self.consumptive_use_tot,
-                'consumptive_use_tot corrected by time_factor_aai',
-                self.coords_idx, self.unit, self.csp_flag
+            correction_factors['time_factor_aai'] = self.time_factor_aai
+
+        # Calc corrected total consumptive use and the consumptive uses,
+        # abstractions, return flows and net abstractions of groundwater and
+        # surface water in one pass
+        (self.consumptive_use_tot, self.consumptive_use_gw,
+         self.consumptive_use_sw, self.abstraction_gw, self.abstraction_sw,
+         self.abstraction_tot, self.return_flow_tot, self.return_flow_gw,
+         self.return_flow_sw, self.net_abstraction_gw,
+         self.net_abstraction_sw) = \
+            me.calc_irr_water_use_gwsw(self.consumptive_use_tot,
+                                       self.fraction_gw_use,
+                                       self.irrigation_efficiency_gw,
+                                       self.irrigation_efficiency_sw,
+                                       self.fraction_return_gw,
+                                       **correction_factors)
+
+        # Print the applied correction factors and the corrected total
+        # consumptive use as returned by the kernel
+        if self.deficit_irrigation_mode:
+            ut.print_cell_values(
+                (
+                    (self.gwd_mask, 'gwd_mask', 'bool'),
+                    (self.abstraction_irr_part_mask,
+                     'abstraction_irr_part_mask', 'bool')
+                    ),
+                self.coords_idx, self.csp_flag
                 )
-
-        # Calc consumptive use of groundwater and surface water
-        self.consumptive_use_gw, self.consumptive_use_sw = \
-            me.calc_gwsw_water_use(
-                self.consumptive_use_tot,
-                self.fraction_gw_use
+        if correction_factors:
+            ut.print_cell_values(
+                tuple((factor, name, '-')
+                      for name, factor in correction_factors.items()) +
+                ((self.consumptive_use_tot, 'consumptive_use_tot corrected',
+                  self.unit),),
+                self.coords_idx, self.csp_flag
                 )
 
-        # Calc total and split abstractions for groundwater and surface water
-        self.abstraction_gw, self.abstraction_sw, self.abstraction_tot = \
-            me.calc_irr_abstraction_totgwsw(self.consumptive_use_gw,
-                                            self.irrigation_efficiency_gw,
-                                            self.consumptive_use_sw,
-                                            self.irrigation_efficiency_sw)
-
-        # Calc and split return flows to groundwater and surface water
-        self.return_flow_tot, self.return_flow_gw, self.return_flow_sw = \
-            me.calc_return_flow_totgwsw(self.abstraction_tot,
-                                        self.consumptive_use_tot,
-                                        self.fraction_return_gw)
-
-        # Calc net abstractions of groundwater and surface water
-        self.net_abstraction_gw, self.net_abstraction_sw = \
-            me.calc_net_abstraction_gwsw(self.abstraction_gw,
-                                         self.return_flow_gw,
-                                         self.abstraction_sw,
-                                         self.return_flow_sw)
-
-        ut.print_cell_value(
-            self.fraction_gw_use, 'fraction_gw_use', self.coords_idx,
-            flag=self.csp_flag
-            )
-        ut.print_cell_value(
-            self.consumptive_use_gw, 'consumptive_use_gw', self.coords_idx,
-            self.unit, self.csp_flag)
-        ut.print_cell_value(
-            self.consumptive_use_sw, 'consumptive_use_sw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.irrigation_efficiency_gw, 'irrigation_efficiency_gw',
-            self.coords_idx, flag=self.csp_flag
-            )
-        ut.print_cell_value(
-            self.abstraction_gw, 'abstraction_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.irrigation_efficiency_sw, 'irrigation_efficiency_sw',
-            self.coords_idx, flag=self.csp_flag)
-        ut.print_cell_value(
-            self.abstraction_sw, 'abstraction_sw', self.coords_idx, self.unit,
-            self.csp_flag)
-        ut.print_cell_value(
-            self.abstraction_tot, 'abstraction_tot', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.return_flow_tot, 'return_flow_tot', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.fraction_return_gw, 'fraction_return_gw', self.coords_idx,
-            flag=self.csp_flag
-            )
-        ut.print_cell_value(
-            self.return_flow_gw, 'return_flow_gw', self.coords_idx, self.unit,
-            self.csp_flag
-            )
-        ut.print_cell_value(
-            self.return_flow_sw, 'return_flow_sw', self.coords_idx, self.unit,
-            self.csp_flag
-            )
-        ut.print_cell_value(
-            self.net_abstraction_gw, 'net_abstraction_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.net_abstraction_sw, 'net_abstraction_sw', self.coords_idx,
-            self.unit, self.csp_flag
+        ut.print_cell_values(
+            (
+                (self.fraction_gw_use, 'fraction_gw_use', '-'),
+                (self.consumptive_use_gw, 'consumptive_use_gw', self.unit),
+                (self.consumptive_use_sw, 'consumptive_use_sw', self.unit),
+                (self.irrigation_efficiency_gw, 'irrigation_efficiency_gw',
+                 '-'),
+                (self.abstraction_gw, 'abstraction_gw', self.unit),
+                (self.irrigation_efficiency_sw, 'irrigation_efficiency_sw',
+                 '-'),
+                (self.abstraction_sw, 'abstraction_sw', self.unit),
+                (self.abstraction_tot, 'abstraction_tot', self.unit),
+                (self.return_flow_tot, 'return_flow_tot', self.unit),
+                (self.fraction_return_gw, 'fraction_return_gw', '-'),
+                (self.return_flow_gw, 'return_flow_gw', self.unit),
+                (self.return_flow_sw, 'return_flow_sw', self.unit),
+                (self.net_abstraction_gw, 'net_abstraction_gw', self.unit),
+                (self.net_abstraction_sw, 'net_abstraction_sw', self.unit)
+                ),
+            self.coords_idx, self.csp_flag
             )
@@ -10,7 +10,6 @@
 # =============================================================================
 """GWSWUSE manufacturing simulation module."""
 
-import xarray as xr
 from gwswuse_logger import get_logger
 from model import model_equations as me
 from model import utils as ut
@@ -75,30 +74,29 @@ class ManufacturingSimulator:
         self.sector_name = 'manufacturing'
         # Initialize relevant configuration settings
         self.csp_flag = config.cell_specific_output['flag']
+        float_precision = config.float_precision
 
         # Set unit
         self.unit = man_data['unit']
 
         # Set total consumptive use input [m3/year]
-        self.consumptive_use_tot = man_data['consumptive_use_tot'].values
+        self.consumptive_use_tot = ut.set_float_precision(
+            man_data['consumptive_use_tot'].values, float_precision)
 
         # Set total abstraction input [m3/year]
-        self.abstraction_tot = man_data['abstraction_tot'].values
+        self.abstraction_tot = ut.set_float_precision(
+            man_data['abstraction_tot'].values, float_precision)
 
         # Set fraction of groundwater use, default to 0 if not provided
-        self.fraction_gw_use = \
-            (man_data['fraction_gw_use'].values
-             if 'fraction_gw_use' in man_data and
-             isinstance(man_data['fraction_gw_use'], xr.DataArray)
-             else 0)
+        self.fraction_gw_use = ut.set_float_precision(
+            ut.get_values_or_zero(man_data, 'fraction_gw_use'),
+            float_precision)
         # Set fraction of groundwater return, default to 0 if not provided
-        self.fraction_return_gw = \
-            (man_data['fraction_return_gw'].values
-             if 'fraction_return_gw' in man_data and
-             isinstance(man_data['fraction_return_gw'], xr.DataArray)
-             else 0)
+        self.fraction_return_gw = ut.set_float_precision(
+            ut.get_values_or_zero(man_data, 'fraction_return_gw'),
+            float_precision)
         # Store the coordinates for later use
-        self.coords = man_data['consumptive_use_tot'].coords
+        self.coords = ut.get_coords(man_data['consumptive_use_tot'])
         # print headline for cell simulation prints
         ut.print_cell_output_headline(
             self.sector_name, config.cell_specific_output, self.csp_flag
@@ -120,77 +118,33 @@ class ManufacturingSimulator:
 
     def simulate_manufacturing(self):
         """Run manufacturing simulation with provided data."""
-        # Calc consumptive use of groundwater and surface water
-        self.consumptive_use_gw, self.consumptive_use_sw = \
-            me.calc_gwsw_water_use(self.consumptive_use_tot,
-                                   self.fraction_gw_use)
-
-        # Calc abstraction of groundwater and surface water
-        self.abstraction_gw, self.abstraction_sw = \
-            me.calc_gwsw_water_use(self.abstraction_tot,
-                                   self.fraction_gw_use)
-
-        # Calc and split return flows to groundwater and surface water
-        self.return_flow_tot, self.return_flow_gw, self.return_flow_sw = \
-            me.calc_return_flow_totgwsw(self.abstraction_tot,
-                                        self.consumptive_use_tot,
-                                        self.fraction_return_gw)
-
-        # Calc net abstractions of groundwater and surface water
-        self.net_abstraction_gw, self.net_abstraction_sw = \
-            me.calc_net_abstraction_gwsw(self.abstraction_gw,
-                                         self.return_flow_gw,
-                                         self.abstraction_sw,
-                                         self.return_flow_sw)
-
-        ut.print_cell_value(
-            self.consumptive_use_tot, 'man_consumptive_use_tot',
-            self.coords_idx, self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.abstraction_tot, 'man_abstraction_tot', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.fraction_gw_use, 'man_fraction_gw_use', self.coords_idx,
-            flag=self.csp_flag
-            )
-        ut.print_cell_value(
-            self.consumptive_use_gw, 'man_consumptive_use_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.consumptive_use_sw, 'man_consumptive_use_sw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.abstraction_gw, 'man_abstraction_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.abstraction_sw, 'man_abstraction_sw', self.coords_idx,
-            self.unit, self.csp_flag)
-        ut.print_cell_value(
-            self.return_flow_tot, 'man_return_flow_tot', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.fraction_return_gw, 'man_fraction_return_gw', self.coords_idx,
-            flag=self.csp_flag
-            )
-        ut.print_cell_value(
-            self.return_flow_gw, 'man_return_flow_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.return_flow_sw, 'man_return_flow_sw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.net_abstraction_gw, 'man_net_abstraction_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.net_abstraction_sw, 'man_net_abstraction_sw', self.coords_idx,
-            self.unit, self.csp_flag
+        # Calc consumptive use and abstraction of groundwater and surface
+        # water, split return flows and calc net abstractions in one pass
+        (self.consumptive_use_gw, self.consumptive_use_sw,
+         self.abstraction_gw, self.abstraction_sw,
+         self.return_flow_tot, self.return_flow_gw, self.return_flow_sw,
+         self.net_abstraction_gw, self.net_abstraction_sw) = \
+            me.calc_sector_water_use_gwsw(self.consumptive_use_tot,
+                                          self.abstraction_tot,
+                                          self.fraction_gw_use,
+                                          self.fraction_return_gw)
+
+        ut.print_cell_values(
+            (
+                (self.consumptive_use_tot, 'man_consumptive_use_tot',
+                 self.unit),
+                (self.abstraction_tot, 'man_abstraction_tot', self.unit),
+                (self.fraction_gw_use, 'man_fraction_gw_use', '-'),
+                (self.consumptive_use_gw, 'man_consumptive_use_gw', self.unit),
+                (self.consumptive_use_sw, 'man_consumptive_use_sw', self.unit),
+                (self.abstraction_gw, 'man_abstraction_gw', self.unit),
+                (self.abstraction_sw, 'man_abstraction_sw', self.unit),
+                (self.return_flow_tot, 'man_return_flow_tot', self.unit),
+                (self.fraction_return_gw, 'man_fraction_return_gw', '-'),
+                (self.return_flow_gw, 'man_return_flow_gw', self.unit),
+                (self.return_flow_sw, 'man_return_flow_sw', self.unit),
+                (self.net_abstraction_gw, 'man_net_abstraction_gw', self.unit),
+                (self.net_abstraction_sw, 'man_net_abstraction_sw', self.unit)
+                ),
+            self.coords_idx, self.csp_flag
             )
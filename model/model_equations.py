@@ -11,19 +11,10 @@
 
 """GWSWUSE model equations for numpy arrays."""
 
-import os
-from numba import njit
+from numba import njit, prange
 import numpy as np
 from model import time_unit_conversion as tc
 
-# =================================================================
-# Get module name and remove the .py extension
-# Module name is passed to logger
-# # ===============================================================
-modname = os.path.basename(__file__)
-modname = modname.split('.')[0]
-
-
 # =========================================================================
 #   model equations which are based on logic for every sector
 # =========================================================================
@@ -67,19 +58,23 @@ def calc_gwsw_water_use(use_tot, fraction_gw_use):
     return use_gw, use_sw
 
 #                  =================================
-#                  ||      CALC RETURN FLOWS      ||
+#                  ||   CALC SECTOR WATER USE     ||
 #                  =================================
 
 
-@njit(cache=True)
-def calc_return_flow_totgwsw(abstraction_tot,
-                             consumptive_use_tot,
-                             fraction_return_gw):
+def calc_sector_water_use_gwsw(consumptive_use_tot, abstraction_tot,
+                               fraction_gw_use, fraction_return_gw):
     """
-    Calculate sector-specific return flows total and to gw and sw.
+    Calculate sector-specific water uses, return flows and net abstractions.
+
+    The function applies `calc_gwsw_water_use` to consumptive use and
+    abstraction and derives the return flows and net abstractions in one
+    pass over the input arrays, without intermediate arrays. The total
+    return flow is the part of the abstraction which is not consumed, it is
+    split with the fraction of return flow to groundwater. Net abstractions
+    are abstractions minus return flows.
 
     The function is used for the following sectors:
-        - Irrigation
         - Domestic
         - Manufacturing
         - Thermal Power
@@ -87,75 +82,94 @@ def calc_return_flow_totgwsw(abstraction_tot,
 
     Parameters
     ----------
-    abstraction_tot : numpy.ndarray
-        Sector-specific abstraction of total water resources.
     consumptive_use_tot : numpy.ndarray
         Sector-specific consumptive use of total water resources.
-    fraction_return_gw : numpy.ndarray or xarray
+    abstraction_tot : numpy.ndarray
+        Sector-specific abstraction of total water resources.
+    fraction_gw_use : numpy.ndarray or int
+        Sector-specific relative fraction of groundwater use.
+    fraction_return_gw : numpy.ndarray or int
         Sector-specific relative fraction of return flow to groundwater.
 
     Returns
     -------
-    return_flow_tot : numpy.ndarray
-        Sector-specific total return flow, calculated as the difference between
-        abstraction and consumptive use of total water resources.
-     return_flow_gw : numpy.ndarray or xarray
-         Sector-specific return flows into groundwater.
-     return_flow_sw : numpy.ndarray
-         Sector-specific return flows into surface waters.
+    tuple of numpy.ndarray
+        consumptive_use_gw, consumptive_use_sw, abstraction_gw,
+        abstraction_sw, return_flow_tot, return_flow_gw, return_flow_sw,
+        net_abstraction_gw and net_abstraction_sw.
     """
-    # calculation of total return flow
-    return_flow_tot = abstraction_tot - consumptive_use_tot
-    return_flow_gw = fraction_return_gw * return_flow_tot
-    return_flow_sw = (1 - fraction_return_gw) * return_flow_tot
-
-    return return_flow_tot, return_flow_gw, return_flow_sw
-
-#                  =================================
-#                  ||    CALC NET ABSTRACTIONS    ||
-#                  =================================
-
-
-@njit(cache=True)
-def calc_net_abstraction_gwsw(abstraction_gw, return_flow_gw,
-                              abstraction_sw, return_flow_sw):
+    return _run_gwsw_kernel(
+        _calc_sector_water_use_gwsw, consumptive_use_tot, abstraction_tot,
+        fraction_gw_use, fraction_return_gw
+        )
+
+
+@njit(parallel=True, cache=True)
+def _calc_sector_water_use_gwsw(consumptive_use_tot, abstraction_tot,
+                                fraction_gw_use, fraction_return_gw):
+    """Calculate all outputs of `calc_sector_water_use_gwsw` per cell."""
+    results = [np.empty(consumptive_use_tot.shape,
+                        dtype=consumptive_use_tot.dtype) for _ in range(9)]
+    (consumptive_use_gw, consumptive_use_sw, abstraction_gw, abstraction_sw,
+     return_flow_tot, return_flow_gw, return_flow_sw, net_abstraction_gw,
+     net_abstraction_sw) = results
+    n_time, n_lat, n_lon = consumptive_use_tot.shape
+    for t in prange(n_time):
+        for i in range(n_lat):
+            for j in range(n_lon):
+                cu_tot = consumptive_use_tot[t, i, j]
+                ab_tot = abstraction_tot[t, i, j]
+                f_gw_use = fraction_gw_use[t, i, j]
+                f_return_gw = fraction_return_gw[t, i, j]
+                # Same operations as in `calc_gwsw_water_use`
+                cu_gw = f_gw_use * cu_tot
+                ab_gw = f_gw_use * ab_tot
+                # Return flows
+                rf_tot = ab_tot - cu_tot
+                rf_gw = f_return_gw * rf_tot
+                rf_sw = (1 - f_return_gw) * rf_tot
+                consumptive_use_gw[t, i, j] = cu_gw
+                consumptive_use_sw[t, i, j] = cu_tot - cu_gw
+                abstraction_gw[t, i, j] = ab_gw
+                abstraction_sw[t, i, j] = ab_tot - ab_gw
+                return_flow_tot[t, i, j] = rf_tot
+                return_flow_gw[t, i, j] = rf_gw
+                return_flow_sw[t, i, j] = rf_sw
+                net_abstraction_gw[t, i, j] = ab_gw - rf_gw
+                net_abstraction_sw[t, i, j] = (ab_tot - ab_gw) - rf_sw
+    return (consumptive_use_gw, consumptive_use_sw, abstraction_gw,
+            abstraction_sw, return_flow_tot, return_flow_gw, return_flow_sw,
+            net_abstraction_gw, net_abstraction_sw)
+
+
+def _run_gwsw_kernel(kernel, *inputs):
     """
-    Calculate sector-specific net abstractions of gw and sw.
+    Run a fused water use kernel on broadcast 3D views of the inputs.
 
-    The function is used for the following sectors:
-        - Irrigation
-        - Domestic
-        - Manufacturing
-        - Thermal Power
-        - Livestock
+    The kernels loop over (time, lat, lon), inputs of fewer dimensions and
+    scalars are broadcast without copying. All inputs are cast to their
+    common type before the kernel is run.
 
     Parameters
     ----------
-    abstraction_gw : numpy.ndarray
-        Sector-specific abstraction of groundwater.
-    return_flow_gw : numpy.ndarray
-        Sector-specific return flows into groundwater.
-    abstraction_sw : numpy.ndarray
-        Sector-specific abstraction of surface waters.
-    return_flow_sw : numpy.ndarray
-        Sector-specific return flows into surface waters.
+    kernel : numba.core.registry.CPUDispatcher
+        Fused kernel taking 3D arrays of equal shape.
+    *inputs : numpy.ndarray or float
+        Input variables of the kernel.
 
     Returns
     -------
-    net_abstraction_gw : numpy.ndarray
-        Sector-specific net abstraction of groundwater.
-    net_abstraction_sw : numpy.ndarray
-        Sector-specific net abstraction of surface waters.
-
+    tuple of numpy.ndarray
+        Results of the kernel in the broadcast shape of the inputs.
     """
-    # sector-specific net abstraction of groundwater
-    net_abstraction_gw = \
-        abstraction_gw - return_flow_gw
-    # sector-specific net abstraction of surface water
-    net_abstraction_sw = \
-        abstraction_sw - return_flow_sw
-
-    return net_abstraction_gw, net_abstraction_sw
+    dtype = np.result_type(*inputs)
+    shape = np.broadcast_shapes(*(np.shape(var) for var in inputs))
+    kernel_shape = (1,) * (3 - len(shape)) + shape
+    results = kernel(
+        *(np.broadcast_to(np.asarray(var, dtype=dtype), kernel_shape)
+          for var in inputs)
+        )
+    return tuple(result.reshape(shape) for result in results)
 
 # =============================================================================
 #   model equations only for irrigation sector
@@ -194,27 +208,15 @@ def set_irr_deficit_locations(gwd_mask,
         criteria have the specified deficit irrigation factor.
 
     """
-    # Initialize the result grid with NaN values
-    deficit_irrigation_location = \
-        np.full_like(gwd_mask, np.nan, dtype=float)
-
-    # Set grid cell = deficit_irrigation_factor, if both masks have the value 1
-    # and not NaN
-    deficit_irrigation_location[
-        (gwd_mask == 1) &
-        (abstraction_irr_part_mask == 1) &
-        ~np.isnan(gwd_mask) &
-        ~np.isnan(abstraction_irr_part_mask)
-        ] = \
-        deficit_irrigation_factor
-
-    # Set grid cell = 1, if one of the masks has a value not equal to 1 and
-    # not NaN
-    deficit_irrigation_location[((gwd_mask != 1) |
-                                 (abstraction_irr_part_mask != 1)) &
-                                ~(np.isnan(gwd_mask) |
-                                  np.isnan(abstraction_irr_part_mask))
-                                ] = 1
+    # Set grid cell = NaN, if one of the masks is NaN, otherwise set grid
+    # cell = deficit_irrigation_factor, if both masks have the value 1, and
+    # grid cell = 1, if one of the masks has a value not equal to 1
+    deficit_irrigation_location = np.where(
+        np.isnan(gwd_mask) | np.isnan(abstraction_irr_part_mask),
+        np.nan,
+        np.where((gwd_mask == 1) & (abstraction_irr_part_mask == 1),
+                 float(deficit_irrigation_factor), 1.)
+        )
 
     return deficit_irrigation_location
 
@@ -356,8 +358,6 @@ def set_irr_efficiency_gw(efficiency_sw, threshold=0.7, mode="enforce"):
         Irrigation efficiency for groundwater abstraction infrastructure,
         following the rules set by the selected method.
     """
-    efficiency_gw = np.full_like(efficiency_sw, np.nan)
-
     if mode == "enforce":
         # Set all non-NaN values to the threshold, preserve NaNs
         efficiency_gw = np.where(np.isnan(efficiency_sw),
@@ -369,6 +369,8 @@ def set_irr_efficiency_gw(efficiency_sw, threshold=0.7, mode="enforce"):
         efficiency_gw = np.where(np.isnan(efficiency_sw),
                                  efficiency_sw,
                                  np.maximum(efficiency_sw, threshold))
+    else:
+        efficiency_gw = np.full_like(efficiency_sw, np.nan)
     return efficiency_gw
 
 #                  =================================
@@ -412,6 +414,118 @@ def calc_irr_abstraction_totgwsw(irr_consumptive_use_gw, irr_efficiency_gw,
     irr_abstraction_tot = irr_abstraction_gw + irr_abstraction_sw
     return irr_abstraction_gw, irr_abstraction_sw, irr_abstraction_tot
 
+#                  =================================
+#                  ||   CALC IRRIGATION WATER USE ||
+#                  =================================
+
+
+def calc_irr_water_use_gwsw(irr_consumptive_use_tot, fraction_gw_use,
+                            irr_efficiency_gw, irr_efficiency_sw,
+                            fraction_return_gw, fraction_aai_aei=1,
+                            deficit_irrigation_location=1,
+                            time_factor_aai=1):
+    """
+    Calculate irrigation water uses, return flows and net abstractions.
+
+    The function combines `calc_irr_consumptive_use_aai`,
+    `calc_irr_deficit_consumptive_use_tot`,
+    `correct_irr_consumptive_use_by_t_aai`, `calc_gwsw_water_use` and
+    `calc_irr_abstraction_totgwsw` in one pass over the input arrays and
+    derives return flows and net abstractions as
+    `calc_sector_water_use_gwsw` does, without intermediate arrays.
+    Corrections of total consumptive use which are not applied keep their
+    default factor of 1.
+
+    The function is used for the following sectors:
+        - Irrigation
+
+    Parameters
+    ----------
+    irr_consumptive_use_tot : numpy.ndarray
+        Irrigation-specific consumptive use of total water resources prior
+        to the corrections.
+    fraction_gw_use : numpy.ndarray or int
+        Irrigation-specific relative fraction of groundwater use.
+    irr_efficiency_gw : numpy.ndarray or float
+        Irrigation efficiency for groundwater abstraction infrastructure.
+    irr_efficiency_sw : numpy.ndarray or float
+        Irrigation efficiency for surface water abstraction infrastructure.
+    fraction_return_gw : numpy.ndarray or int
+        Irrigation-specific relative fraction of return flow to groundwater.
+    fraction_aai_aei : numpy.ndarray or int, optional
+        Fraction of areas actually irrigated to areas equipped for
+        irrigation. Default is 1.
+    deficit_irrigation_location : numpy.ndarray or int, optional
+        Grid with the deficit irrigation factor for cells meeting the
+        deficit irrigation criteria. Default is 1.
+    time_factor_aai : numpy.ndarray or int, optional
+        Temporal development factor of areas actually irrigated. Default
+        is 1.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        consumptive_use_tot (corrected), consumptive_use_gw,
+        consumptive_use_sw, abstraction_gw, abstraction_sw, abstraction_tot,
+        return_flow_tot, return_flow_gw, return_flow_sw, net_abstraction_gw
+        and net_abstraction_sw.
+    """
+    return _run_gwsw_kernel(
+        _calc_irr_water_use_gwsw, irr_consumptive_use_tot, fraction_aai_aei,
+        deficit_irrigation_location, time_factor_aai, fraction_gw_use,
+        irr_efficiency_gw, irr_efficiency_sw, fraction_return_gw
+        )
+
+
+@njit(parallel=True, cache=True, error_model='numpy')
+def _calc_irr_water_use_gwsw(irr_consumptive_use_tot, fraction_aai_aei,
+                             deficit_irrigation_location, time_factor_aai,
+                             fraction_gw_use, irr_efficiency_gw,
+                             irr_efficiency_sw, fraction_return_gw):
+    """Calculate all outputs of `calc_irr_water_use_gwsw` per cell."""
+    results = [np.empty(irr_consumptive_use_tot.shape,
+                        dtype=irr_consumptive_use_tot.dtype)
+               for _ in range(11)]
+    (consumptive_use_tot, consumptive_use_gw, consumptive_use_sw,
+     abstraction_gw, abstraction_sw, abstraction_tot, return_flow_tot,
+     return_flow_gw, return_flow_sw, net_abstraction_gw,
+     net_abstraction_sw) = results
+    n_time, n_lat, n_lon = irr_consumptive_use_tot.shape
+    for t in prange(n_time):
+        for i in range(n_lat):
+            for j in range(n_lon):
+                # Corrections in the order of the single model equations
+                cu_tot = irr_consumptive_use_tot[t, i, j]
+                cu_tot = cu_tot * fraction_aai_aei[t, i, j]
+                cu_tot = cu_tot * deficit_irrigation_location[t, i, j]
+                cu_tot = cu_tot * time_factor_aai[t, i, j]
+                f_return_gw = fraction_return_gw[t, i, j]
+                # Same operations as in the single model equations
+                cu_gw = fraction_gw_use[t, i, j] * cu_tot
+                cu_sw = cu_tot - cu_gw
+                ab_gw = cu_gw / irr_efficiency_gw[t, i, j]
+                ab_sw = cu_sw / irr_efficiency_sw[t, i, j]
+                ab_tot = ab_gw + ab_sw
+                # Return flows as in `calc_sector_water_use_gwsw`
+                rf_tot = ab_tot - cu_tot
+                rf_gw = f_return_gw * rf_tot
+                rf_sw = (1 - f_return_gw) * rf_tot
+                consumptive_use_tot[t, i, j] = cu_tot
+                consumptive_use_gw[t, i, j] = cu_gw
+                consumptive_use_sw[t, i, j] = cu_sw
+                abstraction_gw[t, i, j] = ab_gw
+                abstraction_sw[t, i, j] = ab_sw
+                abstraction_tot[t, i, j] = ab_tot
+                return_flow_tot[t, i, j] = rf_tot
+                return_flow_gw[t, i, j] = rf_gw
+                return_flow_sw[t, i, j] = rf_sw
+                net_abstraction_gw[t, i, j] = ab_gw - rf_gw
+                net_abstraction_sw[t, i, j] = ab_sw - rf_sw
+    return (consumptive_use_tot, consumptive_use_gw, consumptive_use_sw,
+            abstraction_gw, abstraction_sw, abstraction_tot, return_flow_tot,
+            return_flow_gw, return_flow_sw, net_abstraction_gw,
+            net_abstraction_sw)
+
 # =============================================================================
 #   model equation only for total sector
 # =============================================================================
@@ -11,16 +11,8 @@
 """
 GWSWUSE module with unit and data structure convert functions.
 """
-import os
 import numpy as np
 
-# ===============================================================
-# Get module name and remove the .py extension
-# Module name is passed to logger
-# # ===============================================================
-modname = os.path.basename(__file__)
-modname = modname.split('.')[0]
-
 #                  =================================
 #                  ||    UNIT CONVERT FUNCTIONS   ||
 #                  =================================
@@ -182,54 +182,26 @@ class TotalSectorsSimulator():
         ut.print_cell_output_headline(
             'total', config.cell_specific_output, self.csp_flag
             )
-        ut.print_cell_value(
-            self.consumptive_use_tot, 'total_consumptive_use_tot',
-            self.coords_idx, self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.abstraction_tot, 'total_abstraction_tot',
-            self.coords_idx, self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.fraction_gw_use, 'total_fraction_gw_use', self.coords_idx,
-            flag=self.csp_flag
-            )
-        ut.print_cell_value(
-            self.consumptive_use_gw, 'total_consumptive_use_gw',
-            self.coords_idx, self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.consumptive_use_sw, 'total_consumptive_use_sw',
-            self.coords_idx, self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.abstraction_gw, 'total_abstraction_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.abstraction_sw, 'total_abstraction_sw', self.coords_idx,
-            self.unit, self.csp_flag)
-        ut.print_cell_value(
-            self.return_flow_tot, 'total_return_flow_tot', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.fraction_return_gw, 'total_fraction_return_gw',
-            self.coords_idx, flag=self.csp_flag
-            )
-        ut.print_cell_value(
-            self.return_flow_gw, 'total_return_flow_gw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.return_flow_sw, 'total_return_flow_sw', self.coords_idx,
-            self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.net_abstraction_gw, 'total_net_abstraction_gw',
-            self.coords_idx, self.unit, self.csp_flag
-            )
-        ut.print_cell_value(
-            self.net_abstraction_sw, 'total_net_abstraction_sw',
-            self.coords_idx, self.unit, self.csp_flag
+        ut.print_cell_values(
+            (
+                (self.consumptive_use_tot, 'total_consumptive_use_tot',
+                 self.unit),
+                (self.abstraction_tot, 'total_abstraction_tot', self.unit),
+                (self.fraction_gw_use, 'total_fraction_gw_use', '-'),
+                (self.consumptive_use_gw, 'total_consumptive_use_gw',
+                 self.unit),
+                (self.consumptive_use_sw, 'total_consumptive_use_sw',
+                 self.unit),
+                (self.abstraction_gw, 'total_abstraction_gw', self.unit),
+                (self.abstraction_sw, 'total_abstraction_sw', self.unit),
+                (self.return_flow_tot, 'total_return_flow_tot', self.unit),
+                (self.fraction_return_gw, 'total_fraction_return_gw', '-'),
+                (self.return_flow_gw, 'total_return_flow_gw', self.unit),
+                (self.return_flow_sw, 'total_return_flow_sw', self.unit),
+                (self.net_abstraction_gw, 'total_net_abstraction_gw',
+                 self.unit),
+                (self.net_abstraction_sw, 'total_net_abstraction_sw',
+                 self.unit)
+                ),
+            self.coords_idx, self.csp_flag
             )
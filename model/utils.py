@@ -11,11 +11,94 @@
 """GWSWUSE utility functions for model component."""
 
 import numpy as np
-import pandas as pd
+import xarray as xr
 from gwswuse_logger import get_logger
 
 logger = get_logger(__name__)
 
+# Functions selecting the cell value of an array by its number of dimensions
+CELL_VALUE_GETTERS = {
+    3: lambda var, coords_idx: var[coords_idx[0], coords_idx[1],
+                                   coords_idx[2]],
+    2: lambda var, coords_idx: var[coords_idx[1], coords_idx[2]],
+    1: lambda var, coords_idx: var[0],
+    }
+
+
+def get_values_or_zero(sector_data, key, default=0):
+    """
+    Get values of an optional sector variable, defaulting to 0.
+
+    Parameters
+    ----------
+    sector_data : dict
+        Dictionary containing xarray.DataArrays for the sector variables.
+    key : str
+        Name of the variable, e.g. 'fraction_gw_use'.
+    default : numpy.ndarray or int, optional
+        Values returned if the variable is not provided as xarray.DataArray.
+        Default is 0.
+
+    Returns
+    -------
+    numpy.ndarray or int
+        Values of the variable, or the default if it is not provided.
+    """
+    value = sector_data.get(key)
+    if isinstance(value, xr.DataArray):
+        return value.values
+    return default
+
+
+def get_coords(xr_data):
+    """
+    Get the coordinate variables of an xarray object.
+
+    Unlike `xr_data.coords`, the returned dictionary does not keep a
+    reference to `xr_data`, so the input data can be released once its
+    values have been extracted.
+
+    Parameters
+    ----------
+    xr_data : xarray.DataArray
+        The xarray object whose coordinates are returned.
+
+    Returns
+    -------
+    dict
+        Dictionary of coordinate names and xarray.Variable objects, including
+        their values and attributes. Dimension coordinates come first, in the
+        order of the dimensions of `xr_data`.
+    """
+    # The order of dimension coordinates matters, as xarray infers the
+    # dimensions of a new DataArray from the order of a coords dictionary
+    names = [dim for dim in xr_data.dims if dim in xr_data.coords]
+    names += [name for name in xr_data.coords if name not in names]
+    return {name: xr_data.coords[name].variable for name in names}
+
+
+def set_float_precision(values, float_precision):
+    """
+    Cast array values to the configured floating point precision.
+
+    Parameters
+    ----------
+    values : numpy.ndarray, float, or int
+        Values of a sector variable. Scalars are returned unchanged.
+    float_precision : str or None
+        Floating point type, 'float32' or 'float64'. If None, the values are
+        returned unchanged.
+
+    Returns
+    -------
+    numpy.ndarray, float, or int
+        Values in the configured precision, without copy if they already
+        have it.
+    """
+    if float_precision is None or not isinstance(values, np.ndarray):
+        return values
+    return values.astype(float_precision, copy=False)
+
 
 def print_cell_output_headline(sector, cell_specific_option, flag):
     """
@@ -112,35 +195,91 @@ def get_np_coords_cell_idx(xr_data, sector, cell_specific_option, flag):
 
         # Determine the date based on sector and availability of 'month'
         if sector in ["irrigation", "total"] and month:
-            # Timestamp for month-specific cases
-            date = pd.Timestamp(f'{year}-{month:02d}-01')
+            # Date for month-specific cases
+            date = np.datetime64(f'{year:04d}-{month:02d}-01')
         else:
-            # Timestamp for start of the year
-            date = pd.Timestamp(f'{year}-01-01')
+            # Date for start of the year
+            date = np.datetime64(f'{year:04d}-01-01')
 
-        # Select the nearest point based on lat, lon, and time
-        selected_data = xr_data.sel(
-            lat=lat, lon=lon, time=date, method='nearest'
-            )
-        # Find the NumPy indices of the nearest time coordinate
-        time_idx = np.where(
-            xr_data.coords['time'].values ==
-            np.datetime64(selected_data.coords['time'].values)
-            )[0][0]
-
-        # Find the NumPy indices for latitude and longitude
-        lat_idx = np.where(
-            xr_data.coords['lat'].values == selected_data.coords['lat'].values
-            )[0][0]
-        lon_idx = np.where(
-            xr_data.coords['lon'].values == selected_data.coords['lon'].values
-            )[0][0]
+        # Find the NumPy indices of the nearest time, latitude and longitude
+        time_values = xr_data.coords['time'].values
+        time_idx = get_nearest_idx(time_values,
+                                   date.astype(time_values.dtype))
+        lat_idx = get_nearest_idx(xr_data.coords['lat'].values, lat)
+        lon_idx = get_nearest_idx(xr_data.coords['lon'].values, lon)
 
         # Return the indices and the actual coordinates
         return (time_idx, lat_idx, lon_idx)
     return None, None
 
 
+def get_np_coords_cells_idx(xr_data, lats, lons, dates):
+    """
+    Get NumPy indices for nearest lat, lon, and time of several cells.
+
+    Parameters
+    ----------
+    xr_data : xarray.DataArray or xarray.Dataset
+        The xarray object containing the data to find coordinates in.
+    lats : array_like
+        Latitudes of the cells.
+    lons : array_like
+        Longitudes of the cells.
+    dates : array_like
+        Dates of the cells, convertible to numpy.datetime64.
+
+    Returns
+    -------
+    tuple
+        A tuple of index arrays (time_idx, lat_idx, lon_idx) for the nearest
+        time, latitude, and longitude of each cell.
+    """
+    time_values = xr_data.coords['time'].values
+    time_idx = get_nearest_idx(
+        time_values, np.asarray(dates, dtype=time_values.dtype))
+    lat_idx = get_nearest_idx(xr_data.coords['lat'].values, np.asarray(lats))
+    lon_idx = get_nearest_idx(xr_data.coords['lon'].values, np.asarray(lons))
+    return (time_idx, lat_idx, lon_idx)
+
+
+def get_nearest_idx(values, value):
+    """
+    Get the index of the coordinate value nearest to the given value(s).
+
+    The index is found by binary search, so the coordinate values have to be
+    sorted, either ascending or descending. Ties are resolved towards the
+    larger coordinate value, as by xarray's `sel(method='nearest')`.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Sorted 1D coordinate values, e.g. latitudes, longitudes or times.
+    value : float, numpy.datetime64 or numpy.ndarray
+        The value or array of values to search for.
+
+    Returns
+    -------
+    int or numpy.ndarray
+        The index of the nearest coordinate value, or an array of indices if
+        an array of values is given.
+    """
+    n_values = len(values)
+    if n_values == 1:
+        return 0 if np.ndim(value) == 0 else np.zeros(np.shape(value), int)
+    descending = values[0] > values[-1]
+    ascending_values = values[::-1] if descending else values
+
+    # Index of the first value not smaller than the searched value, clipped
+    # so that it has a smaller neighbour
+    idx = np.clip(np.searchsorted(ascending_values, value), 1, n_values - 1)
+    idx = idx - (value - ascending_values[idx - 1] <
+                 ascending_values[idx] - value)
+    if descending:
+        idx = n_values - 1 - idx
+
+    return int(idx) if np.ndim(idx) == 0 else idx
+
+
 def print_cell_value(var, var_name, coords_idx=None, unit="-", flag=False):
     """
     Log value of the variable for specific cell indices.
@@ -166,30 +305,56 @@ def print_cell_value(var, var_name, coords_idx=None, unit="-", flag=False):
         If True, the function will log the value. If False, the function will
         do nothing. Default is False.
     """
+    if flag:
+        logger.info("%s [%s]: %s", var_name, unit,
+                    get_cell_value(var, coords_idx))
+
+
+def print_cell_values(cell_vars, coords_idx=None, flag=False):
+    """
+    Log values of several variables for specific cell indices at once.
+
+    The lines of all variables are joined and logged as a single record
+    instead of one record per variable.
 
+    Parameters
+    ----------
+    cell_vars : iterable of tuple
+        Tuples of (var, var_name, unit) for each variable to log, see
+        `print_cell_value` for a description of the items.
+    coords_idx : tuple or list, optional
+        A tuple or list containing the indices (time_idx, lat_idx, lon_idx)
+        for the specific cell.
+    flag : bool, optional
+        If True, the function will log the values. If False, the function
+        will do nothing. Default is False.
+    """
     if flag:
-        # Check if var is a scalar (int, float)
-        if isinstance(var, (float, int)):
-            logger.info("%s [%s]: %s", var_name, unit, var)
-
-        # If var is a numpy array, handle based on its dimensions
-        elif hasattr(var, 'ndim'):
-            if var.ndim == 3:
-                logger.info(
-                    "%s [%s]: %s", var_name, unit,
-                    var[coords_idx[0], coords_idx[1], coords_idx[2]]
-                    )
-            elif var.ndim == 2:
-                logger.info(
-                    "%s [%s]: %s", var_name, unit,
-                    var[coords_idx[1], coords_idx[2]]
-                    )
-            elif var.ndim == 1:
-                logger.info("%s [%s]: %s", var_name, unit, var[0])
-            else:
-                logger.info("%s [%s]: %s", var_name, unit, var)
-        else:
-            logger.info("%s [%s]: %s", var_name, unit, var)
+        logger.info("\n".join(
+            [f"{var_name} [{unit}]: {get_cell_value(var, coords_idx)!s}"
+             for var, var_name, unit in cell_vars]
+            ))
+
+
+def get_cell_value(var, coords_idx):
+    """
+    Get value of the variable for specific cell indices.
+
+    Parameters
+    ----------
+    var : numpy.ndarray, float, or int
+        The variable whose cell value is selected.
+    coords_idx : tuple or list
+        A tuple or list containing the indices (time_idx, lat_idx, lon_idx).
+
+    Returns
+    -------
+    float or int
+        Value of the variable for the cell, scalars are returned as they are.
+    """
+    # Select the cell value of arrays based on their dimensions
+    get_value = CELL_VALUE_GETTERS.get(getattr(var, 'ndim', None))
+    return var if get_value is None else get_value(var, coords_idx)
 
 
 def test_net_abstraction_tot(
@@ -147,6 +147,25 @@ class TestConfigHandler(unittest.TestCase):
         self.assertEqual(config.start_year, 1901)
         self.assertEqual(config.end_year, 1905)
 
+    # =========================================================================
+    @patch('builtins.print')
+    @patch('controller.configuration_module.logger')
+    def test_validate_input_chunks(self, mock_logger, mock_print):
+        """Test that only valid chunk sizes pass `input_chunks` checks."""
+        config = ConfigHandler(self.valid_config_filename)
+        for input_chunks in [None, {}, {'time': 12, 'lat': -1},
+                             {'lat': 'auto'}]:
+            config.errors_found = False
+            config.input_chunks = input_chunks
+            config._validate_performance_setting()
+            self.assertFalse(config.errors_found, input_chunks)
+        for input_chunks in [[12], {'time': True}, {'time': 0},
+                             {'lat': -2}, {'lat': 1.5}, {'lat': 'full'}]:
+            config.errors_found = False
+            config.input_chunks = input_chunks
+            config._validate_performance_setting()
+            self.assertTrue(config.errors_found, input_chunks)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test controller.input_data_manager"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest.mock import patch
+import numpy as np
+import xarray as xr
+from controller.input_data_manager import (
+    check_results_handling, compute_preprocessed_data, freeze_conventions,
+    load_netcdf_files, open_netcdf_files)
+from controller.input_data_check_preprocessing import initialize_check_logs
+
+
+class TestCheckResultsHandling(unittest.TestCase):
+    """Unit test class for the handling of input data check results."""
+
+    def setUp(self):
+        """Set up check logs without any issues."""
+        self.check_logs = initialize_check_logs()
+        self.check_logs.pop("lat_lon_reference")
+
+    @patch('controller.input_data_manager.logger')
+    def test_no_issues(self, mock_logger):
+        """Test that check logs without issues do not abort."""
+        check_results_handling(self.check_logs)
+        mock_logger.critical.assert_not_called()
+
+    @patch('controller.input_data_manager.logger')
+    def test_non_critical_issues(self, mock_logger):
+        """Test that non-critical issues are logged without aborting."""
+        self.check_logs["unknown_vars"].append("irrigation/pirruse")
+        self.check_logs["missing_time_coverage"].append(
+            "domestic/consumptive_use_tot")
+        self.check_logs["extended_time_period"].append(
+            "domestic/consumptive_use_tot")
+        check_results_handling(self.check_logs)
+        mock_logger.critical.assert_not_called()
+        logged_messages = \
+            [call[0][1] for call in mock_logger.log.call_args_list]
+        self.assertTrue(any("Unknown variables" in message
+                            for message in logged_messages))
+
+    @patch('controller.input_data_manager.logger')
+    def test_critical_issues(self, mock_logger):
+        """Test that critical issues abort with exit code 1."""
+        self.check_logs["missing_time_coverage"].append(
+            "domestic/consumptive_use_tot")
+        with self.assertRaises(SystemExit) as cm:
+            check_results_handling(self.check_logs)
+        self.assertEqual(cm.exception.code, 1)
+        mock_logger.critical.assert_called()
+
+    @patch('controller.input_data_manager.logger')
+    def test_fail_fast(self, mock_logger):
+        """Test that the first critical category aborts if failing fast."""
+        self.check_logs["too_many_vars"].append("irrigation/pirruse")
+        self.check_logs["unknown_vars"].append("irrigation/pirruse")
+        self.check_logs["lat_lon_consistency"] = False
+        with self.assertRaises(SystemExit):
+            check_results_handling(self.check_logs)
+        # Only the first critical category and the exit message are logged
+        self.assertEqual(mock_logger.critical.call_count, 2)
+        mock_logger.log.assert_not_called()
+
+        mock_logger.reset_mock()
+        with self.assertRaises(SystemExit):
+            check_results_handling(self.check_logs, fail_fast=False)
+        self.assertEqual(mock_logger.critical.call_count, 3)
+        mock_logger.log.assert_called_once()
+
+
+class TestLoadNetcdfFiles(unittest.TestCase):
+    """Unit test class for loading the input data."""
+
+    @patch('controller.input_data_manager.logger')
+    def test_missing_sector(self, mock_logger):
+        """Test that a missing required sector directory aborts."""
+        sector_requirements = {
+            'domestic': {'expected_vars': ['consumptive_use_tot']},
+            'livestock': {'expected_vars': ['consumptive_use_tot']}
+            }
+        with tempfile.TemporaryDirectory() as input_data_path:
+            os.makedirs(os.path.join(input_data_path, 'domestic',
+                                     'consumptive_use_tot'))
+            with self.assertRaises(SystemExit) as cm:
+                load_netcdf_files(input_data_path, sector_requirements)
+        self.assertEqual(cm.exception.code, 1)
+        self.assertIn('livestock', mock_logger.critical.call_args[0][2])
+
+    def test_open_netcdf3_files(self):
+        """Test that NetCDF3 files are opened by the detected engine."""
+        dataset = xr.Dataset(
+            {'pdomuse': (('time', 'lat'), np.arange(6.).reshape(3, 2))},
+            coords={'time': np.arange(3), 'lat': [0.25, -0.25]}
+            )
+        dataset['pdomuse'].attrs['units'] = 'm3/month'
+        with tempfile.TemporaryDirectory() as input_data_path:
+            netcdf_files = [
+                os.path.join(input_data_path, f'pdomuse_{i}.nc')
+                for i in range(2)]
+            dataset.isel(time=slice(0, 2)).to_netcdf(
+                netcdf_files[0], format='NETCDF3_64BIT')
+            dataset.isel(time=slice(2, None)).to_netcdf(
+                netcdf_files[1], format='NETCDF3_CLASSIC')
+
+            single = open_netcdf_files(netcdf_files[:1], {})
+            self.assertTrue(single.equals(dataset.isel(time=slice(0, 2))))
+            combined = open_netcdf_files(netcdf_files, {})
+            self.assertTrue(combined.identical(dataset))
+            single.close()
+            combined.close()
+
+    def test_open_netcdf_files_without_time(self):
+        """Test combining files without time dimension by coordinates."""
+        dataset = xr.Dataset(
+            {'irr_efficiency': (('lat', 'lon'),
+                                np.arange(8.).reshape(4, 2))},
+            coords={'lat': [0.75, 0.25, -0.25, -0.75], 'lon': [0.25, 0.75]}
+            )
+        dataset['irr_efficiency'].attrs['units'] = '-'
+        with tempfile.TemporaryDirectory() as input_data_path:
+            netcdf_files = [
+                os.path.join(input_data_path, f'irr_efficiency_{i}.nc')
+                for i in range(2)]
+            # File names sort against the order of the latitude tiles
+            dataset.isel(lat=slice(2, None)).to_netcdf(netcdf_files[0])
+            dataset.isel(lat=slice(0, 2)).to_netcdf(netcdf_files[1])
+
+            combined = open_netcdf_files(netcdf_files, {})
+            self.assertNotIn('time', combined.dims)
+            self.assertTrue(combined.identical(dataset))
+            combined.close()
+
+    def test_open_netcdf_files_time_order(self):
+        """Test that files split in time are joined in time order."""
+        dataset = xr.Dataset(
+            {'pdomuse': (('time', 'lat'), np.arange(8.).reshape(4, 2))},
+            coords={'time': np.arange(4), 'lat': [0.25, -0.25]}
+            )
+        with tempfile.TemporaryDirectory() as input_data_path:
+            netcdf_files = [
+                os.path.join(input_data_path, f'pdomuse_{i}.nc')
+                for i in range(2)]
+            dataset.isel(time=slice(2, None)).to_netcdf(netcdf_files[0])
+            dataset.isel(time=slice(0, 2)).to_netcdf(netcdf_files[1])
+
+            combined = open_netcdf_files(netcdf_files, {})
+            self.assertTrue(combined.equals(dataset))
+            combined.close()
+
+            dataset.isel(time=slice(2, None)).assign_coords(
+                lat=[0.75, 0.25]).to_netcdf(netcdf_files[0])
+            with self.assertRaises(ValueError):
+                open_netcdf_files(netcdf_files, {})
+
+    def test_concurrent_opens(self):
+        """Test opening many NetCDF4 files concurrently in new processes."""
+        sector_requirements = {'domestic': {'expected_vars': []}}
+        with tempfile.TemporaryDirectory() as input_data_path:
+            for i in range(24):
+                variable = f'variable_{i}'
+                sector_requirements['domestic']['expected_vars'].append(
+                    variable)
+                variable_path = os.path.join(input_data_path, 'domestic',
+                                             variable)
+                os.makedirs(variable_path)
+                for j in range(3):
+                    xr.Dataset(
+                        {variable: (('time', 'lat'), np.ones((12, 36)))},
+                        coords={'time': np.arange(12) + 12 * j,
+                                'lat': np.arange(36.)}
+                        ).to_netcdf(os.path.join(variable_path, f'{j}.nc'),
+                                    engine='netcdf4')
+
+            # Failures of thread-unsafe opens depend on the state of the
+            # HDF5 library, so each attempt runs in a new process
+            script = textwrap.dedent(f"""
+                import dask
+                from controller.input_data_manager import load_netcdf_files
+                datasets = load_netcdf_files(
+                    {input_data_path!r}, {sector_requirements!r},
+                    max_workers=32)
+                dask.compute(*datasets['domestic'].values())
+                """)
+            for _ in range(4):
+                result = subprocess.run(
+                    [sys.executable, '-c', script], capture_output=True,
+                    text=True, check=False,
+                    cwd=os.path.dirname(os.path.dirname(__file__)))
+                self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class TestComputePreprocessedData(unittest.TestCase):
+    """Unit test class for computing the preprocessed input data."""
+
+    def test_compute_preprocessed_data(self):
+        """Test that dask-backed input data are computed in place."""
+        data = xr.DataArray(np.arange(6.).reshape(2, 3), dims=('lat', 'lon'))
+        preprocessed_data = {'domestic': {'unit': 'm3/year',
+                                          'fraction_gw_use': data.chunk()}}
+        computed_data = compute_preprocessed_data(preprocessed_data)
+        self.assertEqual(computed_data['domestic']['unit'], 'm3/year')
+        self.assertIsNone(computed_data['domestic']['fraction_gw_use'].chunks)
+        self.assertTrue(
+            computed_data['domestic']['fraction_gw_use'].equals(data))
+
+
+class TestFreezeConventions(unittest.TestCase):
+    """Unit test class for read-only conventions."""
+
+    def test_freeze_conventions(self):
+        """Test that nested conventions are converted to read-only objects."""
+        conventions = freeze_conventions({
+            'reference_names': ['pirruse'],
+            'sector_requirements': {'irrigation': {'time_freq': 'monthly'}}
+            })
+        self.assertEqual(conventions['reference_names'], ('pirruse',))
+        self.assertEqual(
+            conventions['sector_requirements']['irrigation']['time_freq'],
+            'monthly')
+        with self.assertRaises(TypeError):
+            conventions['sector_requirements']['livestock'] = {}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,10 +14,11 @@
 import unittest
 import numpy as np
 from model.model_equations import \
-    (calc_gwsw_water_use, calc_return_flow_totgwsw, calc_net_abstraction_gwsw,
+    (calc_gwsw_water_use, calc_sector_water_use_gwsw,
      set_irr_deficit_locations, calc_irr_deficit_consumptive_use_tot,
      calc_irr_consumptive_use_aai, correct_irr_consumptive_use_by_t_aai,
      set_irr_efficiency_gw, calc_irr_abstraction_totgwsw,
+     calc_irr_water_use_gwsw,
      calc_cross_sector_totals, calc_total_fractions)
 
 
@@ -121,16 +122,16 @@ class TestModelEquations(unittest.TestCase):
         self.assertTrue(np.all(
             (consumptive_use_sw >= 0) & (consumptive_use_sw <= 7e8)))
 
-    def test_calc_return_flow_totgwsw(self):
-        """Test the `calc_return_flow_totgwsw` function."""
+    def test_calc_sector_return_flows(self):
+        """Test return flows of `calc_sector_water_use_gwsw`."""
         exp_return_flow_tot = self.return_flow_tot
         exp_return_flow_gw = self.return_flow_gw
         exp_return_flow_sw = self.return_flow_sw
 
         return_flow_tot, return_flow_gw, return_flow_sw = \
-            calc_return_flow_totgwsw(self.abstraction_tot,
-                                     self.consumptive_use_tot,
-                                     self.fraction)
+            calc_sector_water_use_gwsw(self.consumptive_use_tot,
+                                       self.abstraction_tot,
+                                       self.fraction, self.fraction)[4:7]
 
         self.assertTrue(np.allclose(return_flow_tot,
                                     exp_return_flow_tot,
@@ -143,16 +144,16 @@ class TestModelEquations(unittest.TestCase):
                                     equal_nan=True, atol=0, rtol=1e-9),
                         msg=f"{return_flow_sw}")
 
-    def test_calc_return_flow_totgwsw_range(self):
-        """Test range of `calc_return_flow_totgwsw`function."""
+    def test_calc_sector_return_flows_range(self):
+        """Test range of return flows of `calc_sector_water_use_gwsw`."""
         consumptive_use_tot = np.random.uniform(6e8, 7e8, size=(3, 360, 720))
         abstraction_tot = np.random.uniform(8e8, 2e9, size=(3, 360, 720))
         fraction_return_gw = np.random.uniform(0.4, 0.8, size=(360, 720))
 
         return_flow_tot, return_flow_gw, return_flow_sw = \
-            calc_return_flow_totgwsw(
-                abstraction_tot, consumptive_use_tot, fraction_return_gw
-                )
+            calc_sector_water_use_gwsw(
+                consumptive_use_tot, abstraction_tot, 0, fraction_return_gw
+                )[4:7]
 
         self.assertTrue(np.all((return_flow_tot >= 1e8) &
                         (return_flow_tot <= 1.4e9)))
@@ -161,39 +162,42 @@ class TestModelEquations(unittest.TestCase):
         self.assertTrue(np.all((return_flow_sw >= 1e8*0.2) &
                                (return_flow_sw <= 1.4e9*0.6)))
 
-    def test_calc_net_abstraction_gwsw(self):
-        """Test the `calc_net_abstraction_gwsw` function."""
+    def test_calc_sector_net_abstractions(self):
+        """Test net abstractions of `calc_sector_water_use_gwsw`."""
         net_abstraction_gw, net_abstraction_sw = \
-            calc_net_abstraction_gwsw(self.abstraction_gw,
-                                      self.return_flow_gw,
-                                      self.abstraction_sw,
-                                      self.return_flow_sw)
+            calc_sector_water_use_gwsw(self.consumptive_use_tot,
+                                       self.abstraction_tot,
+                                       self.fraction, self.fraction)[7:]
         self.assertTrue(np.allclose(net_abstraction_gw,
                                     self.net_abstraction_gw,
-                                    equal_nan=True, atol=0, rtol=0),
+                                    equal_nan=True, atol=0, rtol=1e-9),
                         f"{net_abstraction_gw}")
         self.assertTrue(np.allclose(net_abstraction_sw,
                                     self.net_abstraction_sw,
-                                    equal_nan=True, atol=0, rtol=0),
+                                    equal_nan=True, atol=0, rtol=1e-9),
                         f"{net_abstraction_sw}")
 
-    def test_calc_net_abstraction_gwsw_range(self):
-        """Test range of `calc_net_abstraction_gwsw` function."""
-        abstraction = np.random.uniform(8e8, 2e9, size=(3, 360, 720))
-        return_flow = np.random.uniform(6e8, 7e8, size=(3, 360, 720))
+    def test_calc_sector_net_abstractions_range(self):
+        """Test range of net abstractions of `calc_sector_water_use_gwsw`."""
+        consumptive_use_tot = np.random.uniform(6e8, 7e8, size=(3, 360, 720))
+        abstraction_tot = np.random.uniform(8e8, 2e9, size=(3, 360, 720))
 
+        # All water is used and returned from a single resource
+        net_abstraction_gw, net_abstraction_sw = \
+            calc_sector_water_use_gwsw(consumptive_use_tot, abstraction_tot,
+                                       1, 1)[7:]
+        self.assertTrue(np.allclose(net_abstraction_gw, consumptive_use_tot,
+                                    atol=0, rtol=1e-9))
+        self.assertTrue(np.all(net_abstraction_sw == 0))
         net_abstraction_gw, net_abstraction_sw = \
-            calc_net_abstraction_gwsw(abstraction,
-                                      return_flow,
-                                      abstraction,
-                                      return_flow)
-        self.assertTrue(np.all((net_abstraction_gw >= 1e8) &
-                               (net_abstraction_gw <= 1.4e9)))
-        self.assertTrue(np.all((net_abstraction_sw >= 1e8) &
-                               (net_abstraction_sw <= 1.4e9)))
+            calc_sector_water_use_gwsw(consumptive_use_tot, abstraction_tot,
+                                       0, 0)[7:]
+        self.assertTrue(np.all(net_abstraction_gw == 0))
+        self.assertTrue(np.allclose(net_abstraction_sw, consumptive_use_tot,
+                                    atol=0, rtol=1e-9))
 
     def test_set_irr_deficit_locations(self):
-        """Test the `calc_net_abstraction_gwsw` function."""
+        """Test the `set_irr_deficit_locations` function."""
         exp_deficit_irrigation_location = self.deficit_irrigation_location
 
         deficit_irrigation_location = set_irr_deficit_locations(
@@ -204,7 +208,7 @@ class TestModelEquations(unittest.TestCase):
                                     equal_nan=True, atol=0, rtol=1e-9))
 
     def test_set_irr_deficit_locations_1(self):
-        """Test the `calc_net_abstraction_gwsw` function."""
+        """Test the `set_irr_deficit_locations` function."""
         exp_deficit_irrigation_location = self.deficit_irrigation_location
 
         deficit_irrigation_location = set_irr_deficit_locations(
@@ -214,6 +218,75 @@ class TestModelEquations(unittest.TestCase):
                                     exp_deficit_irrigation_location,
                                     equal_nan=True, atol=0, rtol=1e-9))
 
+    def test_calc_sector_water_use_gwsw(self):
+        """Test the `calc_sector_water_use_gwsw` function."""
+        expected = (self.consumptive_use_gw, self.consumptive_use_sw,
+                    self.abstraction_gw, self.abstraction_sw,
+                    self.return_flow_tot, self.return_flow_gw,
+                    self.return_flow_sw, self.net_abstraction_gw,
+                    self.net_abstraction_sw)
+        results = calc_sector_water_use_gwsw(
+            self.consumptive_use_tot, self.abstraction_tot, self.fraction,
+            self.fraction)
+        for result, exp_result in zip(results, expected):
+            self.assertTrue(np.allclose(result, exp_result, equal_nan=True,
+                                        atol=0, rtol=1e-9))
+
+        # Fractions set to 0 by default
+        results = calc_sector_water_use_gwsw(
+            self.consumptive_use_tot, self.abstraction_tot, 0, 0)
+        np.testing.assert_array_equal(results[1], self.consumptive_use_tot)
+        np.testing.assert_array_equal(results[8], self.abstraction_tot
+                                      - self.consumptive_use_tot)
+
+    def test_calc_irr_water_use_gwsw(self):
+        """Test `calc_irr_water_use_gwsw` against the single equations."""
+        efficiency_gw = self.enforce_efficiency_gw
+        consumptive_use_gw, consumptive_use_sw = calc_gwsw_water_use(
+            self.consumptive_use_tot, self.fraction)
+        abstraction_gw, abstraction_sw, abstraction_tot = \
+            calc_irr_abstraction_totgwsw(consumptive_use_gw, efficiency_gw,
+                                         consumptive_use_sw,
+                                         self.efficiency_sw)
+        # Without return flows to groundwater
+        return_flow_tot = abstraction_tot - self.consumptive_use_tot
+        return_flow_gw = 0 * return_flow_tot
+        return_flow_sw = return_flow_tot
+        expected = (self.consumptive_use_tot, consumptive_use_gw,
+                    consumptive_use_sw, abstraction_gw, abstraction_sw,
+                    abstraction_tot, return_flow_tot, return_flow_gw,
+                    return_flow_sw, abstraction_gw - return_flow_gw,
+                    abstraction_sw - return_flow_sw)
+
+        results = calc_irr_water_use_gwsw(
+            self.consumptive_use_tot, self.fraction, efficiency_gw,
+            self.efficiency_sw, 0)
+        for result, exp_result in zip(results, expected):
+            np.testing.assert_array_equal(result, exp_result)
+
+        # Efficiencies of 0 result in infinite abstractions
+        results = calc_irr_water_use_gwsw(
+            self.consumptive_use_tot, self.fraction, efficiency_gw, 0., 0)
+        self.assertTrue(np.isinf(results[4][0, 0, 0]))
+
+        # Corrections are applied in the order of the single equations
+        factor_2d = self.fraction[0]
+        exp_consumptive_use_tot = correct_irr_consumptive_use_by_t_aai(
+            calc_irr_deficit_consumptive_use_tot(
+                calc_irr_consumptive_use_aai(self.consumptive_use_tot,
+                                             self.fraction),
+                factor_2d),
+            self.fraction)
+        results = calc_irr_water_use_gwsw(
+            self.consumptive_use_tot, self.fraction, efficiency_gw,
+            self.efficiency_sw, 0, fraction_aai_aei=self.fraction,
+            deficit_irrigation_location=factor_2d,
+            time_factor_aai=self.fraction)
+        np.testing.assert_array_equal(results[0], exp_consumptive_use_tot)
+        np.testing.assert_array_equal(
+            results[1], calc_gwsw_water_use(exp_consumptive_use_tot,
+                                            self.fraction)[0])
+
     def test_calc_irr_deficit_consumptive_use_tot(self):
         """Test the `calc_irr_deficit_consumptive_use_tot` function."""
         exp_consumptive_use_deficit = self.consumptive_use_gw
@@ -404,17 +477,10 @@ class TestModelEquations(unittest.TestCase):
     def test_dom_man_tp_liv_net_abstraction(self):
         """Test `net_abstraction_sum`."""
 
-        abstraction_gw, abstraction_sw = \
-            calc_gwsw_water_use(self.abstraction_tot, self.fraction)
-
-        _, return_flow_gw, return_flow_sw = \
-            calc_return_flow_totgwsw(self.abstraction_tot,
-                                     self.consumptive_use_tot,
-                                     self.fraction)
-
         net_abstraction_gw, net_abstraction_sw = \
-            calc_net_abstraction_gwsw(abstraction_gw, return_flow_gw,
-                                      abstraction_sw, return_flow_sw)
+            calc_sector_water_use_gwsw(self.consumptive_use_tot,
+                                       self.abstraction_tot,
+                                       self.fraction, self.fraction)[7:]
 
         net_abstraction_tot = net_abstraction_gw + net_abstraction_sw
 
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""test controller.preprocessing_functions.py"""
+
+import unittest
+import xarray as xr
+import numpy as np
+import pandas as pd
+from controller.preprocessing_functions import (
+    ensure_correct_dimension_order, sort_lat_desc_lon_asc_coords,
+    trim_and_reorder_xr_data, extend_xr_data)
+
+
+class TestPreprocessingFunctions(unittest.TestCase):
+    """Unit test class for the preprocessing functions."""
+
+    def setUp(self):
+        """Set up a small monthly DataArray used in all test cases."""
+        self.times = pd.date_range('2000-01-01', '2001-12-31', freq='MS')
+        self.latitudes = np.array([0.75, 0.25, -0.25])
+        self.longitudes = np.array([-0.75, -0.25, 0.25, 0.75])
+        self.data = xr.DataArray(
+            np.random.rand(len(self.times), len(self.latitudes),
+                           len(self.longitudes)),
+            coords={'time': self.times, 'lat': self.latitudes,
+                    'lon': self.longitudes},
+            dims=('time', 'lat', 'lon'), name='pirruse'
+            )
+
+    def test_ensure_correct_dimension_order(self):
+        """Test `ensure_correct_dimension_order` for numpy and dask data."""
+        transposed = self.data.transpose('lon', 'time', 'lat')
+
+        ordered = ensure_correct_dimension_order(transposed)
+        self.assertEqual(ordered.dims, ('time', 'lat', 'lon'))
+        self.assertTrue(ordered.equals(self.data))
+
+        ordered = ensure_correct_dimension_order(transposed.chunk())
+        self.assertEqual(ordered.dims, ('time', 'lat', 'lon'))
+        self.assertTrue(ordered.equals(self.data))
+
+        # Data in the correct order is returned unchanged
+        self.assertIs(ensure_correct_dimension_order(self.data), self.data)
+
+        # Only the data variables of a Dataset in a different order are
+        # transposed
+        dataset = xr.Dataset({'pirruse': transposed,
+                              'pirrww': self.data.isel(time=0)})
+        ordered = ensure_correct_dimension_order(dataset)
+        self.assertEqual(ordered['pirruse'].dims, ('time', 'lat', 'lon'))
+        self.assertTrue(ordered['pirruse'].equals(self.data))
+        self.assertIs(ordered['pirrww'].data, dataset['pirrww'].data)
+        self.assertIs(ensure_correct_dimension_order(ordered), ordered)
+
+    def test_sort_lat_desc_lon_asc_coords(self):
+        """Test `sort_lat_desc_lon_asc_coords` for unsorted coordinates."""
+        # Sorted data are returned unchanged
+        self.assertIs(sort_lat_desc_lon_asc_coords(self.data), self.data)
+
+        unsorted = self.data.isel(lat=slice(None, None, -1),
+                                  lon=[2, 0, 3, 1]).chunk()
+        sorted_data = sort_lat_desc_lon_asc_coords(unsorted)
+        self.assertIsNotNone(sorted_data.chunks)
+        self.assertTrue(sorted_data.equals(self.data))
+
+    def test_trim_and_reorder_xr_data(self):
+        """Test `trim_and_reorder_xr_data` with transposed dask data."""
+        transposed = self.data.transpose('lat', 'lon', 'time').chunk()
+
+        trimmed = trim_and_reorder_xr_data(transposed, 2001, 2001)
+        self.assertEqual(trimmed.dims, ('time', 'lat', 'lon'))
+        self.assertEqual(trimmed.sizes['time'], 12)
+        np.testing.assert_array_equal(trimmed.values,
+                                      self.data.values[12:])
+
+        # Time chunks of the trimmed period are merged
+        trimmed = trim_and_reorder_xr_data(self.data.chunk({'time': 6}),
+                                           2000, 2001)
+        self.assertEqual(trimmed.chunksizes['time'], (24,))
+
+    def test_extend_xr_data(self):
+        """Test `extend_xr_data` for a monthly Dataset."""
+        self.data.attrs['units'] = 'm3/month'
+        dataset = self.data.to_dataset()
+
+        extended = extend_xr_data(dataset, 1999, 2003, 'monthly')
+        self.assertEqual(extended.sizes['time'], 60)
+        self.assertEqual(extended['pirruse'].attrs['units'], 'm3/month')
+
+        values = extended['pirruse'].values
+        original = self.data.values
+        # First and last year of the data are repeated at start and end
+        np.testing.assert_array_equal(values[:12], original[:12])
+        np.testing.assert_array_equal(values[12:36], original)
+        np.testing.assert_array_equal(values[36:48], original[12:])
+        np.testing.assert_array_equal(values[48:], original[12:])
+
+        # All variables of a Dataset are extended
+        dataset['pirrww'] = 2 * self.data
+        extended = extend_xr_data(dataset, 1999, 2003, 'monthly')
+        np.testing.assert_array_equal(extended['pirrww'].values,
+                                      2 * values)
+
+        # Data covering the target period are only trimmed
+        extended = extend_xr_data(self.data, 2001, 2001, 'monthly')
+        np.testing.assert_array_equal(extended.values, original[12:])
+
+        # Data beyond the target period are not inserted
+        extended = extend_xr_data(self.data, 1999, 2000, 'monthly')
+        np.testing.assert_array_equal(extended.values[:12], original[:12])
+        np.testing.assert_array_equal(extended.values[12:], original[:12])
+
+        # Time steps not matching the target time steps are inserted by month
+        mid_month = self.data.assign_coords(
+            time=self.times + pd.Timedelta(days=14))
+        extended = extend_xr_data(mid_month, 1999, 2003, 'monthly')
+        np.testing.assert_array_equal(extended.values, values)
+
+        # Dask-backed data of such time steps are extended lazily
+        extended = extend_xr_data(mid_month.chunk({'time': 6, 'lat': 1}),
+                                  1999, 2003, 'monthly')
+        self.assertEqual(extended.chunksizes['lat'], (1, 1, 1))
+        np.testing.assert_array_equal(extended.values, values)
+
+    def test_extend_xr_data_concat(self):
+        """Test `extend_xr_data` for a small extension of dask data."""
+        years = pd.date_range('2000-01-01', '2009-12-31', freq='YS')
+        data = xr.DataArray(
+            np.random.rand(len(years), len(self.latitudes),
+                           len(self.longitudes)),
+            coords={'time': years, 'lat': self.latitudes,
+                    'lon': self.longitudes},
+            dims=('time', 'lat', 'lon'), name='pdomuse'
+            ).chunk()
+
+        extended = extend_xr_data(data, 1999, 2009, 'yearly')
+        self.assertIsNotNone(extended.chunks)
+        self.assertEqual(extended.sizes['time'], 11)
+        self.assertEqual(pd.Timestamp(extended.time.values[0]).year, 1999)
+        np.testing.assert_array_equal(extended.values[0], data.values[0])
+        np.testing.assert_array_equal(extended.values[1:], data.values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test model.utils"""
+
+import unittest
+import numpy as np
+import pandas as pd
+import xarray as xr
+from model.utils import (
+    get_coords, get_nearest_idx, get_np_coords_cell_idx,
+    get_np_coords_cells_idx, get_values_or_zero,
+    print_cell_value, print_cell_values, set_float_precision)
+
+
+class TestCellIdx(unittest.TestCase):
+    """Unit test class for the cell index lookup."""
+
+    def setUp(self):
+        """Set up a monthly DataArray on a lat descending grid."""
+        times = pd.date_range('2000-01-01', '2001-12-01', freq='MS')
+        self.latitudes = np.array([1.25, 0.75, 0.25, -0.25])
+        self.longitudes = np.array([-0.75, -0.25, 0.25, 0.75])
+        self.data = xr.DataArray(
+            np.zeros((len(times), len(self.latitudes),
+                      len(self.longitudes))),
+            coords={'time': times, 'lat': self.latitudes,
+                    'lon': self.longitudes},
+            dims=('time', 'lat', 'lon')
+            )
+
+    def test_get_nearest_idx(self):
+        """Test `get_nearest_idx` for ascending and descending values."""
+        self.assertEqual(get_nearest_idx(self.longitudes, -0.3), 1)
+        self.assertEqual(get_nearest_idx(self.longitudes, 5.), 3)
+        self.assertEqual(get_nearest_idx(self.latitudes, 0.3), 2)
+        self.assertEqual(get_nearest_idx(self.latitudes, -5.), 3)
+        # Ties are resolved towards the larger value
+        self.assertEqual(get_nearest_idx(self.longitudes, 0.), 2)
+        self.assertEqual(get_nearest_idx(self.latitudes, 1.), 0)
+        self.assertEqual(get_nearest_idx(np.array([0.25]), 10.), 0)
+
+    def test_get_np_coords_cell_idx(self):
+        """Test `get_np_coords_cell_idx` against xarray's nearest select."""
+        cell_specific_option = {
+            'coords': {'lat': 0.6, 'lon': 0.3, 'year': 2001, 'month': 3}}
+        time_idx, lat_idx, lon_idx = get_np_coords_cell_idx(
+            self.data, 'irrigation', cell_specific_option, True)
+        self.assertEqual((time_idx, lat_idx, lon_idx), (14, 1, 2))
+
+        # Yearly sectors use the start of the year
+        time_idx, _, _ = get_np_coords_cell_idx(
+            self.data, 'domestic', cell_specific_option, True)
+        self.assertEqual(time_idx, 12)
+
+    def test_get_np_coords_cells_idx(self):
+        """Test `get_np_coords_cells_idx` for several cells."""
+        lats = [0.6, -5., 1.25]
+        lons = [0.3, -0.3, 5.]
+        dates = ['2001-03-01', '2000-01-01', '2003-01-01']
+        time_idx, lat_idx, lon_idx = get_np_coords_cells_idx(
+            self.data, lats, lons, dates)
+        np.testing.assert_array_equal(time_idx, [14, 0, 23])
+        np.testing.assert_array_equal(lat_idx, [1, 3, 0])
+        np.testing.assert_array_equal(lon_idx, [2, 1, 3])
+
+    def test_get_coords(self):
+        """Test `get_coords` keeps the dimension order of the data."""
+        data = xr.DataArray(
+            self.data.values,
+            coords={'lon': self.longitudes, 'lat': self.latitudes,
+                    'time': self.data.time.values},
+            dims=('time', 'lat', 'lon'))
+        data.lat.attrs['units'] = 'degrees_north'
+        coords = get_coords(data)
+        self.assertEqual(list(coords), ['time', 'lat', 'lon'])
+        self.assertEqual(coords['lat'].attrs['units'], 'degrees_north')
+
+        rebuilt = xr.DataArray(data.values, coords=coords)
+        self.assertEqual(rebuilt.dims, ('time', 'lat', 'lon'))
+        self.assertTrue(rebuilt.equals(data))
+
+    def test_print_cell_value(self):
+        """Test `print_cell_value` for scalars and arrays."""
+        coords_idx = (1, 2, 3)
+        data = np.arange(24.).reshape(2, 3, 4)
+        with self.assertLogs('model.utils', level='INFO') as logs:
+            print_cell_value(0.5, 'fraction', coords_idx, '-', True)
+            print_cell_value(data, 'pdomuse', coords_idx, 'm3/year', True)
+            print_cell_value(data[0], 'pdomuse', coords_idx, 'm3/year', True)
+            print_cell_value(data[0, 0], 'pdomuse', coords_idx, '-', True)
+        self.assertEqual(
+            [record.getMessage() for record in logs.records],
+            ['fraction [-]: 0.5', 'pdomuse [m3/year]: 23.0',
+             'pdomuse [m3/year]: 11.0', 'pdomuse [-]: 0.0'])
+
+        # Nothing is logged if the flag is not set
+        with self.assertNoLogs('model.utils', level='INFO'):
+            print_cell_value(data, 'pdomuse', coords_idx, 'm3/year', False)
+
+    def test_print_cell_values(self):
+        """Test `print_cell_values` logs all values in one record."""
+        coords_idx = (1, 2, 3)
+        data = np.arange(24.).reshape(2, 3, 4)
+        cell_vars = ((data, 'pdomuse', 'm3/year'),
+                     (np.float32(0.3939), 'fraction', '-'))
+        with self.assertLogs('model.utils', level='INFO') as logs:
+            print_cell_values(cell_vars, coords_idx, True)
+        self.assertEqual(
+            [record.getMessage() for record in logs.records],
+            ['pdomuse [m3/year]: 23.0\nfraction [-]: 0.3939'])
+
+        with self.assertNoLogs('model.utils', level='INFO'):
+            print_cell_values(cell_vars, coords_idx, False)
+
+    def test_get_values_or_zero(self):
+        """Test `get_values_or_zero` for provided and missing variables."""
+        sector_data = {'fraction_gw_use': self.data,
+                       'fraction_return_gw': None}
+        self.assertIs(get_values_or_zero(sector_data, 'fraction_gw_use'),
+                      self.data.values)
+        self.assertEqual(
+            get_values_or_zero(sector_data, 'fraction_return_gw'), 0)
+        self.assertEqual(get_values_or_zero({}, 'fraction_gw_use'), 0)
+        # Only DataArrays provide values, other objects give the default
+        dataset = self.data.to_dataset(name='fraction_gw_use')
+        self.assertEqual(get_values_or_zero({'fraction_gw_use': dataset},
+                                            'fraction_gw_use'), 0)
+        default = np.ones(3)
+        self.assertIs(get_values_or_zero({}, 'abstraction_tot', default),
+                      default)
+
+    def test_set_float_precision(self):
+        """Test `set_float_precision` for arrays and scalars."""
+        values = self.data.values
+        self.assertEqual(set_float_precision(values, 'float32').dtype,
+                         np.float32)
+        self.assertIs(set_float_precision(values, 'float64'), values)
+        self.assertIs(set_float_precision(values, None), values)
+        self.assertEqual(set_float_precision(0, 'float32'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()